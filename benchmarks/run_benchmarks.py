@@ -0,0 +1,278 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Benchmarks of the pyefd functions, sweeping contour length, order,
+batch size and dtype, with the results written as JSON.
+
+Besides the timings, every benchmark records the peak memory traced by
+:py:mod:`tracemalloc` during one call, and the memory and number of
+blocks still allocated after it (i.e. the size of the result). The
+number of allocations made during the call is not collected, as
+:py:mod:`tracemalloc` only sees the blocks alive at a snapshot.
+
+Run all benchmarks and store the results:
+
+.. code:: bash
+
+    $ python benchmarks/run_benchmarks.py --output results.json
+
+Compare a new run against stored results, failing if any benchmark
+got more than 20 % slower or uses more than 20 % more peak memory:
+
+.. code:: bash
+
+    $ python benchmarks/run_benchmarks.py --compare results.json --threshold 1.2
+
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+# hack to get the import from within module directory to work
+# see also: https://stackoverflow.com/a/16985066
+SCRIPT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+if SCRIPT_DIR not in sys.path:
+    sys.path.append(SCRIPT_DIR)
+
+import pyefd  # noqa: E402
+
+LENGTHS = (100, 1000, 10000)
+ORDERS = (10, 50)
+BATCH_SIZES = (1, 100)
+DTYPES = ("float64", "float32")
+FUNCTIONS = (
+    "elliptic_fourier_descriptors",
+    "normalize_efd",
+    "calculate_dc_coefficients",
+    "reconstruct_contour",
+)
+
+
+def make_contour(num_points, rng):
+    """Return a closed, star shaped contour with ``num_points`` vertices."""
+    angles = np.linspace(0, 2 * np.pi, num_points, endpoint=False)
+    radii = 10.0 + np.cos(5 * angles) + rng.normal(0, 0.1, num_points)
+    return np.stack([radii * np.cos(angles), radii * np.sin(angles)], axis=1)
+
+
+def _workload(function, contours, order, dtype):
+    """Return a callable running ``function`` once over all contours."""
+    batch_size = len(contours)
+    if function == "elliptic_fourier_descriptors":
+        if batch_size == 1:
+            return lambda: pyefd.elliptic_fourier_descriptors(
+                contours[0], order=order, dtype=dtype
+            )
+        coordinates, offsets = pyefd.pack_contours(contours)
+        return lambda: pyefd.elliptic_fourier_descriptors_batch(
+            coordinates, offsets, order=order, dtype=dtype
+        )
+    elif function == "calculate_dc_coefficients":
+        return lambda: [
+            pyefd.calculate_dc_coefficients(contour, dtype=dtype)
+            for contour in contours
+        ]
+
+    coeffs = np.stack(
+        [pyefd.elliptic_fourier_descriptors(c, order=order) for c in contours]
+    ).astype(dtype)
+    if batch_size == 1:
+        coeffs = coeffs[0]
+    if function == "normalize_efd":
+        return lambda: pyefd.normalize_efd(coeffs, dtype=dtype)
+    elif function == "reconstruct_contour":
+        num_points = contours[0].shape[0]
+        return lambda: pyefd.reconstruct_contour(
+            coeffs, num_points=num_points, dtype=dtype
+        )
+    raise ValueError("Unknown function {0!r}.".format(function))
+
+
+def measure(workload, repeat=5, min_time=0.05):
+    """Time ``workload``, returning the best and median time of one call.
+
+    Each of the ``repeat`` measurements calls the workload as many times as
+    needed to run for at least ``min_time`` seconds.
+
+    """
+    workload()
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            workload()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 2
+
+    timings = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            workload()
+        timings.append((time.perf_counter() - start) / number)
+    return {
+        "best": min(timings),
+        "median": float(np.median(timings)),
+        "repeat": repeat,
+        "number": number,
+    }
+
+
+def measure_memory(workload):
+    """Trace the memory allocated by one call of ``workload``.
+
+    Returns the peak memory allocated during the call, and the memory
+    (``retained_memory``) and net number of blocks (``net_blocks``) still
+    allocated once it returns, in excess of those allocated before it.
+    ``net_blocks`` is not the number of allocations made by the call:
+    temporaries freed before it returns are not counted. Only allocations
+    through the Python allocators and NumPy's array data are traced, which
+    covers all of pyefd.
+
+    """
+    workload()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        result = workload()  # noqa: F841 kept alive for the snapshot
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    untraced = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    retained = after.filter_traces(untraced).compare_to(
+        before.filter_traces(untraced), "filename"
+    )
+    return {
+        "peak_memory": peak - size,
+        "retained_memory": sum(stat.size_diff for stat in retained),
+        "net_blocks": sum(stat.count_diff for stat in retained),
+    }
+
+
+def run(
+    functions=FUNCTIONS,
+    lengths=LENGTHS,
+    orders=ORDERS,
+    batch_sizes=BATCH_SIZES,
+    dtypes=DTYPES,
+    repeat=5,
+    min_time=0.05,
+    seed=0,
+):
+    """Run the benchmark sweep and return the results as a JSON compatible dict."""
+    rng = np.random.default_rng(seed)
+    results = []
+    for function, length, order, batch_size, dtype in itertools.product(
+        functions, lengths, orders, batch_sizes, dtypes
+    ):
+        contours = [make_contour(length, rng) for _ in range(batch_size)]
+        workload = _workload(function, contours, order, dtype)
+        timing = measure(workload, repeat, min_time)
+        timing.update(measure_memory(workload))
+        timing.update(
+            {
+                "function": function,
+                "num_points": length,
+                "order": order,
+                "batch_size": batch_size,
+                "dtype": dtype,
+                "per_contour": timing["best"] / batch_size,
+            }
+        )
+        results.append(timing)
+
+    return {
+        "metadata": {
+            "pyefd": pyefd.__file__,
+            "numpy": np.__version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+        },
+        "results": results,
+    }
+
+
+def _case(result):
+    return tuple(
+        result[k] for k in ("function", "num_points", "order", "batch_size", "dtype")
+    )
+
+
+def compare(baseline, current, threshold=1.2, key="best"):
+    """Return the results of ``current`` with ``key`` above ``threshold`` x ``baseline``.
+
+    Use ``key="best"`` for the time and ``key="peak_memory"`` for the memory use.
+
+    """
+    reference = {_case(r): r.get(key) for r in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        value = reference.get(_case(result))
+        if value and result[key] > threshold * value:
+            regressions.append(
+                dict(result, key=key, baseline=value, ratio=result[key] / value)
+            )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--functions", nargs="+", default=FUNCTIONS)
+    parser.add_argument("--lengths", nargs="+", type=int, default=LENGTHS)
+    parser.add_argument("--orders", nargs="+", type=int, default=ORDERS)
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=BATCH_SIZES)
+    parser.add_argument("--dtypes", nargs="+", default=DTYPES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.05)
+    parser.add_argument("--output", help="File to write the JSON results to.")
+    parser.add_argument("--compare", help="JSON results to compare against.")
+    parser.add_argument("--threshold", type=float, default=1.2)
+    args = parser.parse_args(argv)
+
+    results = run(
+        args.functions,
+        args.lengths,
+        args.orders,
+        args.batch_sizes,
+        args.dtypes,
+        args.repeat,
+        args.min_time,
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, results, args.threshold, "best")
+        regressions += compare(baseline, results, args.threshold, "peak_memory")
+        for r in regressions:
+            message = "Regression: {0} num_points={1} order={2} batch_size={3} "
+            message += "dtype={4}: {5} {6:.4g} vs {7:.4g}"
+            values = _case(r) + (r["key"], r[r["key"]], r["baseline"])
+            print(message.format(*values), file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
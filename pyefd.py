@@ -26,6 +26,16 @@ from __future__ import print_function
 from __future__ import unicode_literals
 from __future__ import absolute_import
 
+import functools
+import hashlib
+import json
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 
 try:
@@ -34,13 +44,270 @@ except NameError:
     _range = range
 
 
-def _prepare_contour(contour):
-    """Return sanitized contour data and segment deltas."""
-    contour = np.asarray(contour, dtype=float)
+#: The functions called with the name of a stage and the time spent in it,
+#: see :py:func:`add_profile_hook`.
+_profile_hooks = []
+_profile_lock = threading.Lock()
+
+#: The stages of the pipeline reported to the profile hooks.
+STAGES = ("prepare", "harmonics", "reduce", "fft", "dc", "normalize", "reconstruct")
+
+StageStats = namedtuple("StageStats", ["calls", "time"])
+StageStats.__doc__ = """Statistics of a stage, as recorded by :py:class:`StageProfiler`.
+
+The fields are the number of ``calls`` and their total ``time`` in seconds.
+
+"""
+
+
+def add_profile_hook(hook):
+    """Register a function to be called after each stage of the pipeline.
+
+    The hook is called as ``hook(stage, elapsed)``, with the name of the stage
+    (one of :py:data:`STAGES`) and the time in seconds it took, from the thread
+    running it. Stages do not nest, except for ``"normalize"`` within the
+    descriptor functions. While no hooks are registered, the instrumentation
+    costs one check of an empty list per stage.
+
+    :param callable hook: The function to call.
+
+    """
+    with _profile_lock:
+        _profile_hooks.append(hook)
+
+
+def remove_profile_hook(hook):
+    """Unregister a function registered by :py:func:`add_profile_hook`.
+
+    :param callable hook: The function to remove.
+
+    """
+    with _profile_lock:
+        _profile_hooks.remove(hook)
+
+
+def _report_stage(stage, elapsed):
+    for hook in tuple(_profile_hooks):
+        hook(stage, elapsed)
+
+
+class _Stage(object):
+    """Context manager timing a stage for the profile hooks."""
+
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *args):
+        _report_stage(self.stage, time.perf_counter() - self.start)
+
+
+class _NoStage(object):
+    """Context manager used in place of :py:class:`_Stage` while not profiling."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *args):
+        pass
+
+
+_NO_STAGE = _NoStage()
+
+
+def _stage(stage):
+    """Return a context manager timing ``stage``, if there are profile hooks."""
+    return _Stage(stage) if _profile_hooks else _NO_STAGE
+
+
+def _profiled(stage):
+    """Decorator timing each call of the decorated function as ``stage``."""
+
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _profile_hooks:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                _report_stage(stage, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+class StageProfiler(object):
+    """Records the cumulative time and number of calls of the pipeline stages.
+
+    Used as a context manager, the profiler records the stages run by all
+    threads while the context is active:
+
+    .. code:: python
+
+        with StageProfiler() as profiler:
+            coeffs = elliptic_fourier_descriptors(contour, order=10)
+        print(profiler.to_dict())
+
+    It can also be started and stopped explicitly with :py:meth:`start` and
+    :py:meth:`stop`, e.g. to sample a long running service periodically.
+
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def __call__(self, stage, elapsed):
+        with self._lock:
+            calls, total = self._stats.get(stage, (0, 0.0))
+            self._stats[stage] = StageStats(calls + 1, total + elapsed)
+
+    def start(self):
+        """Start recording the stages."""
+        add_profile_hook(self)
+
+    def stop(self):
+        """Stop recording the stages."""
+        remove_profile_hook(self)
+
+    def reset(self):
+        """Discard the recorded statistics."""
+        with self._lock:
+            self._stats.clear()
+
+    @property
+    def stats(self):
+        """A dict of the :py:class:`StageStats` of each recorded stage."""
+        with self._lock:
+            return dict(self._stats)
+
+    def to_dict(self):
+        """Return the statistics as ``{stage: {"calls": int, "time": float}}``.
+
+        The result only holds built-in types, for exporting it as e.g. JSON.
+
+        """
+        return {
+            stage: {"calls": stats.calls, "time": stats.time}
+            for stage, stats in self.stats.items()
+        }
+
+
+def _float_dtype(dtype):
+    """Return ``dtype`` as a :py:class:`numpy.dtype`, checking it is a float type."""
+    dtype = np.dtype(dtype)
+    if not np.issubdtype(dtype, np.floating):
+        raise ValueError("The dtype must be a floating point type.")
+    return dtype
+
+
+class PreparedContour(object):
+    """Sanitized contour data, shared between the functions taking a contour.
+
+    Create instances with :py:func:`prepare_contour`. All functions taking a
+    ``[M x 2]`` contour array also accept a prepared contour, so that the
+    segment data is only calculated once for e.g. the locus and the
+    coefficients at several orders.
+
+    :ivar numpy.ndarray contour: The ``[M x 2]`` contour array.
+    :ivar numpy.ndarray dxy: The ``[S x 2]`` deltas of the non-zero-length segments.
+    :ivar numpy.ndarray dt: The ``S`` segment lengths.
+    :ivar numpy.ndarray t: The ``S + 1`` cumulative arc lengths, starting at zero.
+    :ivar float T: The perimeter of the contour.
+
+    """
+
+    __slots__ = ("contour", "dxy", "dt", "t", "T", "_tangents")
+
+    def __init__(self, contour, dxy, dt, t, T):
+        self.contour = contour
+        self.dxy = dxy
+        self.dt = dt
+        self.t = t
+        self.T = T
+        self._tangents = None
+
+    def __repr__(self):
+        return "PreparedContour(vertices={0}, segments={1}, perimeter={2!r})".format(
+            self.contour.shape[0], self.dt.shape[0], float(self.T)
+        )
+
+    @property
+    def dtype(self):
+        """The floating point type of the arrays."""
+        return self.t.dtype
+
+    @property
+    def perimeter(self):
+        """The perimeter of the contour, i.e. ``T``."""
+        return self.T
+
+    @property
+    def tangents(self):
+        """The ``[S x 2]`` unit tangents ``dxy / dt`` of the segments; cached."""
+        if self._tangents is None:
+            self._tangents = self.dxy / self.dt.reshape((-1, 1))
+        return self._tangents
+
+    def astype(self, dtype):
+        """Return the prepared contour with all arrays converted to ``dtype``."""
+        dtype = _float_dtype(dtype)
+        if dtype == self.dtype:
+            return self
+        return PreparedContour(
+            self.contour.astype(dtype),
+            self.dxy.astype(dtype),
+            self.dt.astype(dtype),
+            self.t.astype(dtype),
+            dtype.type(self.T),
+        )
+
+
+def _contour_array(contour):
+    """Return a contour as a ``[M x 2]`` array, of any numeric type.
+
+    The ``[M x 1 x 2]`` layout of OpenCV's contours is accepted as well, and
+    returned as a view.
+
+    """
+    contour = np.asarray(contour)
+    if contour.ndim == 3 and contour.shape[1] == 1:
+        contour = contour[:, 0]
     if contour.ndim != 2 or contour.shape[1] != 2:
-        raise ValueError("Contour array must be of shape [M x 2].")
+        raise ValueError("Contour array must be of shape [M x 2] or [M x 1 x 2].")
+    return contour
 
-    dxy = np.concatenate([np.diff(contour, axis=0), [contour[0] - contour[-1]]])
+
+@_profiled("prepare")
+def _prepare_contour(contour, dtype=float):
+    """Return sanitized contour data and segment deltas."""
+    if isinstance(contour, PreparedContour):
+        return contour.astype(dtype)
+
+    dtype = _float_dtype(dtype)
+    contour = _contour_array(contour)
+
+    # The deltas are computed in the floating point type, with the closing
+    # segment in the last row, casting integer contours only element-wise.
+    dxy = np.empty(contour.shape, dtype=dtype)
+    np.subtract(contour[1:], contour[:-1], out=dxy[:-1], dtype=dtype)
+    np.subtract(contour[0], contour[-1], out=dxy[-1], dtype=dtype)
     dt = np.sqrt((dxy ** 2).sum(axis=1))
     # Remove zero-length segments to avoid division by zero later on.
     non_zero = dt > np.finfo(dt.dtype).eps
@@ -50,128 +317,1152 @@ def _prepare_contour(contour):
 
     dxy = dxy[non_zero]
     dt = dt[non_zero]
-    t = np.concatenate(([0.0], np.cumsum(dt)))
+    t = np.zeros(dt.shape[0] + 1, dtype=dt.dtype)
+    np.cumsum(dt, out=t[1:])
     T = t[-1]
 
-    return contour, dxy, dt, t, T
+    return PreparedContour(contour, dxy, dt, t, T)
+
+
+_METHODS = ("direct", "recurrence")
+
+
+@_profiled("harmonics")
+def _harmonics(phi, orders, method="direct"):
+    """Return ``cos(n * phi)`` and ``sin(n * phi)`` for all ``n`` in ``orders``.
+
+    The ``"direct"`` method evaluates the trigonometric functions on the full
+    phase matrix. The ``"recurrence"`` method evaluates them only once per
+    vertex and obtains the remaining (consecutive) orders by the angle addition
+    recurrence ``exp(i (n + 1) phi) = exp(i n phi) exp(i phi)``.
+
+    """
+    if method == "direct":
+        phi = phi * orders.reshape((-1, 1))
+        return np.cos(phi), np.sin(phi)
+    elif method == "recurrence":
+        powers = np.empty(
+            (orders.shape[0], phi.shape[0]), dtype=np.result_type(phi, np.complex64)
+        )
+        if orders.shape[0] > 0:
+            powers[0].real = np.cos(orders[0] * phi)
+            powers[0].imag = np.sin(orders[0] * phi)
+        if orders.shape[0] > 1:
+            powers[1].real = np.cos(phi)
+            powers[1].imag = np.sin(phi)
+            powers[2:] = powers[1]
+            np.cumprod(powers, axis=0, out=powers)
+        return powers.real, powers.imag
+    else:
+        raise ValueError(
+            "Unknown method {0!r}; expected one of {1}.".format(method, _METHODS)
+        )
+
+
+def _packed_arrays(coordinates, offsets, dtype=float):
+    """Return validated packed coordinate and offset arrays of ``K >= 0`` contours."""
+    coordinates = np.asarray(coordinates, dtype=_float_dtype(dtype))
+    offsets = np.asarray(offsets, dtype=np.intp)
+    if coordinates.ndim != 2 or coordinates.shape[1] != 2:
+        raise ValueError("Coordinate array must be of shape [N x 2].")
+    if (
+        offsets.ndim != 1
+        or offsets.shape[0] < 1
+        or offsets[0] != 0
+        or offsets[-1] != coordinates.shape[0]
+        or np.any(np.diff(offsets) < 1)
+    ):
+        raise ValueError(
+            "Offsets must be an increasing array of size K + 1, "
+            "starting at 0 and ending at the number of coordinates."
+        )
+    return coordinates, offsets
+
+
+_SegmentBatch = namedtuple(
+    "_SegmentBatch",
+    ["coordinates", "offsets", "dxy", "dt", "counts", "segment_offsets"],
+)
+_SegmentBatch.__doc__ = """The non-zero-length segments of packed contours.
+
+The segments of contour ``i`` are ``dxy[segment_offsets[i]:segment_offsets[i + 1]]``,
+``counts[i]`` of them.
+"""
+
+
+@_profiled("prepare")
+def _prepare_segments_batch(coordinates, offsets, dtype=float):
+    """Return the sanitized segments of a packed collection of contours.
+
+    :rtype: :py:class:`_SegmentBatch`
+
+    """
+    coordinates, offsets = _packed_arrays(coordinates, offsets, dtype)
+    if offsets.shape[0] < 2:
+        raise ValueError("There must be at least one contour.")
+
+    # The deltas to the next vertex, wrapping around to the first vertex of
+    # each contour.
+    dxy = np.empty_like(coordinates)
+    np.subtract(coordinates[1:], coordinates[:-1], out=dxy[:-1])
+    dxy[offsets[1:] - 1] = coordinates[offsets[:-1]] - coordinates[offsets[1:] - 1]
+    dt = np.sqrt(dxy[:, 0] ** 2 + dxy[:, 1] ** 2)
+    # Remove zero-length segments to avoid division by zero later on.
+    non_zero = dt > np.finfo(dt.dtype).eps
+    if non_zero.all():
+        counts = np.diff(offsets)
+    else:
+        counts = np.add.reduceat(non_zero.astype(np.intp), offsets[:-1])
+        if np.any(counts == 0):
+            raise ValueError(
+                "Every contour must contain at least one non-zero-length segment."
+            )
+        dxy = dxy[non_zero]
+        dt = dt[non_zero]
+    segment_offsets = np.zeros(counts.shape[0] + 1, dtype=np.intp)
+    np.cumsum(counts, out=segment_offsets[1:])
+
+    return _SegmentBatch(coordinates, offsets, dxy, dt, counts, segment_offsets)
+
+
+# Number of ``[order x chunk_size]`` temporaries alive at the same time in
+# ``_efd_coefficients``, used for converting a memory limit into a chunk size.
+_CHUNK_TEMPORARIES = 5
+
+
+def _chunk_size(order, chunk_size=None, max_memory=None, itemsize=8):
+    """Return the number of segments per block, or ``None`` for all at once."""
+    if chunk_size is None and max_memory is not None:
+        chunk_size = int(max_memory) // (
+            _CHUNK_TEMPORARIES * max(order, 1) * itemsize
+        )
+    if chunk_size is not None and chunk_size < 1:
+        raise ValueError(
+            "Chunk size and memory limit must allow at least one segment."
+        )
+    return chunk_size
+
+
+def _efd_coefficients(
+    prepared, orders, method="direct", chunk_size=None, num_samples=None
+):
+    """Return the ``[len(orders) x 4]`` Fourier coefficients of the given orders.
+
+    The segments are processed in blocks of ``chunk_size``, each adding its
+    partial sums to the result, so that the temporaries are of size
+    ``[len(orders) x chunk_size]`` at most.
+
+    """
+    if method == "fft":
+        return _efd_coefficients_fft(prepared, orders, num_samples)
+
+    T = prepared.T
+    orders = orders.astype(prepared.dtype)
+    phi = (2 * np.pi * prepared.t) / T
+    tangents = prepared.tangents
+    n_segments = tangents.shape[0]
+    if chunk_size is None:
+        chunk_size = n_segments
+
+    coeffs = np.zeros((orders.shape[0], 4), dtype=prepared.dtype)
+    for start in _range(0, n_segments, chunk_size):
+        stop = min(start + chunk_size, n_segments)
+        cos_phi, sin_phi = _harmonics(phi[start : stop + 1], orders, method)
+        with _stage("reduce"):
+            d_cos_phi = np.diff(cos_phi, axis=1)
+            del cos_phi
+            d_sin_phi = np.diff(sin_phi, axis=1)
+            del sin_phi
+            # Columns a and c come from the cosine terms, b and d from the sine terms.
+            coeffs[:, 0::2] += np.dot(d_cos_phi, tangents[start:stop])
+            coeffs[:, 1::2] += np.dot(d_sin_phi, tangents[start:stop])
+
+    coeffs *= (T / (2 * orders * orders * np.pi * np.pi)).reshape((-1, 1))
+    return coeffs
+
+
+def _fft_num_samples(prepared, order, num_samples=None):
+    """Return the number of uniform arc length samples used by the FFT method."""
+    if num_samples is None:
+        num_samples = 1 << int(np.ceil(np.log2(max(prepared.dt.shape[0], 4 * order))))
+    if num_samples <= 2 * order:
+        raise ValueError("The number of samples must be larger than twice the order.")
+    return int(num_samples)
+
+
+@_profiled("fft")
+def _efd_coefficients_fft(prepared, orders, num_samples=None):
+    """Return approximate Fourier coefficients from a uniform resampling of the contour.
+
+    The contour is sampled at ``num_samples`` points equally spaced in arc
+    length, and the coefficients are read off the bins of the real FFT of
+    the samples. The only error is the aliasing of higher harmonics; see
+    :py:func:`fft_error_bound`.
+
+    """
+    dtype = prepared.dtype
+    if orders.shape[0] == 0:
+        return np.zeros((0, 4), dtype=dtype)
+    num_samples = _fft_num_samples(prepared, int(orders[-1]), num_samples)
+
+    # Vertex positions relative to the first vertex, at the arc lengths t.
+    positions = np.zeros((prepared.t.shape[0], 2), dtype=dtype)
+    np.cumsum(prepared.dxy, axis=0, out=positions[1:])
+    s = np.arange(num_samples, dtype=dtype) * (prepared.T / num_samples)
+    samples = np.empty((num_samples, 2), dtype=dtype)
+    samples[:, 0] = np.interp(s, prepared.t, positions[:, 0])
+    samples[:, 1] = np.interp(s, prepared.t, positions[:, 1])
+
+    spectrum = np.fft.rfft(samples, axis=0)[orders] * (2.0 / num_samples)
+    coeffs = np.empty((orders.shape[0], 4), dtype=dtype)
+    coeffs[:, 0::2] = spectrum.real
+    coeffs[:, 1::2] = -spectrum.imag
+    return coeffs
+
+
+def fft_error_bound(contour, order=10, num_samples=None, dtype=float):
+    """Upper bound of the error of the coefficients calculated with ``method="fft"``.
+
+    Sampling the contour uniformly folds the harmonics above the sampling
+    rate onto the calculated ones. The coefficients of harmonic ``k`` of a
+    polygon are bounded by :math:`T V / (2 \\pi^2 k^2)`, with :math:`T` the
+    perimeter and :math:`V` the total variation of the unit tangent
+    component, which bounds the folded sum for each order.
+
+    :param contour: A contour array of size ``[M x 2]``, or a prepared contour
+        from :py:func:`prepare_contour`.
+    :type contour: numpy.ndarray or PreparedContour
+    :param int order: The order of Fourier coefficients to calculate.
+    :param int num_samples: The number of uniform arc length samples, as passed
+        to :py:func:`elliptic_fourier_descriptors`. Default is ``None``, i.e.
+        the default number of samples of the FFT method.
+    :param dtype: The floating point type used throughout the computation.
+        Default is ``float``, i.e. ``numpy.float64``.
+    :type dtype: str or numpy.dtype
+    :return: A ``[order x 4]`` array bounding the absolute error of each coefficient
+        relative to the exact method.
+    :rtype: :py:class:`numpy.ndarray`
+
+    """
+    prepared = _prepare_contour(contour, dtype)
+    num_samples = _fft_num_samples(prepared, order, num_samples)
+
+    # Total variation of the x and y components of the unit tangents, cyclically.
+    tangents = prepared.tangents
+    variation = np.abs(tangents - np.roll(tangents, 1, axis=0)).sum(axis=0)
+
+    # Bound the sum over m >= 1 of 1 / (m N -+ n)^2 by its first term plus
+    # the integral over the remaining ones.
+    x = np.arange(1, order + 1, dtype=prepared.dtype) / num_samples
+    folded = (
+        1 / (1 - x) ** 2 + 1 / (1 - x) + 1 / (1 + x) ** 2 + 1 / (1 + x)
+    ) / num_samples ** 2
+    bound = (prepared.T / (2 * np.pi * np.pi)) * folded.reshape((-1, 1))
+    return np.repeat(bound * variation.reshape((1, 2)), 2, axis=1)
+
+
+def _contour_energy(prepared):
+    """Return the mean squared distance of the contour from its locus.
+
+    By Parseval's theorem this equals the sum of
+    :math:`(a_n^2 + b_n^2 + c_n^2 + d_n^2) / 2` over all harmonics.
+
+    """
+    positions = np.zeros((prepared.t.shape[0], 2), dtype=prepared.dtype)
+    np.cumsum(prepared.dxy, axis=0, out=positions[1:])
+    positions -= positions.mean(axis=0)
+    start, stop = positions[:-1], positions[1:]
+    dt = prepared.dt.reshape((-1, 1))
+    # Exact integrals of p and p^2 along each straight segment.
+    mean = np.sum(dt * (start + stop), axis=0) / (2 * prepared.T)
+    square = np.sum(dt * (start * start + start * stop + stop * stop)) / (
+        3 * prepared.T
+    )
+    return square - np.sum(mean * mean)
+
+
+def _auto_order_coefficients(
+    prepared,
+    tol,
+    max_order,
+    method="direct",
+    chunk_size=None,
+    max_memory=None,
+    num_samples=None,
+):
+    """Return the coefficients up to the lowest order leaving at most ``tol`` energy.
+
+    The harmonics are calculated in blocks of doubling size, until the energy
+    of the remaining harmonics is known to be below the tolerance.
+
+    """
+    if not tol > 0:
+        raise ValueError("The tolerance must be positive.")
+    energy = _contour_energy(prepared)
+    remaining = tol * energy
+    blocks = []
+    order = 0
+    block = 8
+    while order < max_order:
+        orders = np.arange(order + 1, min(order + block, max_order) + 1)
+        coeffs = _efd_coefficients(
+            prepared,
+            orders,
+            method=method,
+            chunk_size=_chunk_size(
+                orders.shape[0], chunk_size, max_memory, prepared.dtype.itemsize
+            ),
+            num_samples=num_samples,
+        )
+        residual = energy - np.cumsum(np.sum(coeffs * coeffs, axis=1) / 2)
+        done = np.flatnonzero(residual <= remaining)
+        if done.shape[0]:
+            blocks.append(coeffs[: done[0] + 1])
+            break
+        blocks.append(coeffs)
+        energy = residual[-1]
+        order = orders[-1]
+        block *= 2
+
+    return np.concatenate(blocks)
 
 
 def elliptic_fourier_descriptors(
-    contour, order=10, normalize=False, return_transformation=False
+    contour,
+    order=10,
+    normalize=False,
+    return_transformation=False,
+    method="direct",
+    chunk_size=None,
+    max_memory=None,
+    dtype=float,
+    num_samples=None,
+    tol=1e-4,
+    max_order=1000,
+    cache=None,
+    backend=None,
 ):
     """Calculate elliptical Fourier descriptors for a contour.
 
-    :param numpy.ndarray contour: A contour array of size ``[M x 2]``.
-    :param int order: The order of Fourier coefficients to calculate.
+    :param contour: A contour array of size ``[M x 2]``, or ``[M x 1 x 2]`` as
+        returned by OpenCV, of any numeric type, or a prepared contour
+        from :py:func:`prepare_contour`.
+    :type contour: numpy.ndarray or PreparedContour
+    :param order: The order of Fourier coefficients to calculate, or ``"auto"``
+        for the lowest order leaving at most the fraction ``tol`` of the contour's
+        energy (its mean squared distance from the locus) in the omitted harmonics.
+    :type order: int or str
     :param bool normalize: If the coefficients should be normalized;
         see references for details.
     :param bool return_transformation: If the normalization parametres should be returned.
         Default is ``False``.
+    :param str method: How the harmonics are evaluated; ``"direct"`` evaluates
+        :math:`cos(n \\phi)` and :math:`sin(n \\phi)` for every order, while
+        ``"recurrence"`` evaluates the trigonometric functions once per vertex and
+        uses the angle addition recurrence for the higher orders. The latter is
+        faster, with a round-off error growing linearly with the order (about
+        ``1e-13`` relative at order 1000). ``"fft"`` resamples the contour uniformly
+        by arc length and reads the coefficients off a real FFT; an approximation
+        for densely sampled contours, with the error bounded by
+        :py:func:`fft_error_bound`. Default is ``"direct"``.
+    :param int chunk_size: If given, the contour segments are processed in blocks
+        of this many segments, bounding the ``[order x M]`` temporaries to about
+        ``5 * order * chunk_size`` floats. Default is ``None``, i.e. all at once.
+    :param int max_memory: An alternative to ``chunk_size``; the approximate
+        number of bytes the temporaries may use, from which the chunk size is derived.
+    :param dtype: The floating point type used throughout the computation.
+        ``numpy.float32`` halves the memory traffic, at the accuracy given in
+        :ref:`float32-accuracy`. Default is ``float``, i.e. ``numpy.float64``.
+    :type dtype: str or numpy.dtype
+    :param int num_samples: The number of uniform arc length samples of the
+        ``"fft"`` method; must be larger than ``2 * order``. Default is ``None``,
+        i.e. the smallest power of two of at least the number of segments and
+        ``4 * order``.
+    :param float tol: The relative energy tolerance of ``order="auto"``.
+        Default is ``1e-4``, i.e. a root mean square reconstruction error of
+        one percent of the contour's radius of gyration.
+    :param int max_order: The highest order ``order="auto"`` may choose.
+        Default is ``1000``.
+    :param cache: If given, results are looked up in and stored to this cache,
+        keyed by the content of the contour and the parametres.
+    :type cache: DescriptorCache or DiskDescriptorCache
+    :param str backend: ``"numpy"`` or ``"numba"``; see :py:func:`set_backend`.
+        The fused loop of the latter makes ``chunk_size`` and ``max_memory`` moot.
+        Default is ``None``, i.e. the backend set by :py:func:`set_backend`.
     :return: A ``[order x 4]`` array of Fourier coefficients and optionally the
         transformation parametres ``scale``, ``psi_1`` (rotation) and ``theta_1`` (phase)
     :rtype: ::py:class:`numpy.ndarray` or (:py:class:`numpy.ndarray`, (float, float, float))
 
     """
-    contour, dxy, dt, t, T = _prepare_contour(contour)
+    if cache is not None:
+        key = cache.key(
+            contour,
+            order=order,
+            normalize=normalize,
+            return_transformation=return_transformation,
+            method=method,
+            dtype=np.dtype(dtype).str,
+            num_samples=num_samples,
+            tol=tol,
+            max_order=max_order,
+        )
+        result = cache.get(key)
+        if result is None:
+            result = elliptic_fourier_descriptors(
+                contour,
+                order=order,
+                normalize=normalize,
+                return_transformation=return_transformation,
+                method=method,
+                chunk_size=chunk_size,
+                max_memory=max_memory,
+                dtype=dtype,
+                num_samples=num_samples,
+                tol=tol,
+                max_order=max_order,
+                backend=backend,
+            )
+            cache.put(key, result)
+        return result
+
+    backend = _check_backend(backend)
+    if backend == "numba" and order != "auto" and method in _METHODS:
+        coeffs = _efd_numba(contour, order, method, dtype)
+    elif order == "auto":
+        # The chosen order is the number of rows of the coefficient array.
+        coeffs = _auto_order_coefficients(
+            _prepare_contour(contour, dtype),
+            tol,
+            max_order,
+            method,
+            chunk_size,
+            max_memory,
+            num_samples,
+        )
+    else:
+        prepared = _prepare_contour(contour, dtype)
+        coeffs = _efd_coefficients(
+            prepared,
+            np.arange(1, order + 1),
+            method=method,
+            chunk_size=_chunk_size(
+                order, chunk_size, max_memory, prepared.dtype.itemsize
+            ),
+            num_samples=num_samples,
+        )
+
+    if normalize:
+        coeffs = normalize_efd(
+            coeffs, return_transformation=return_transformation, dtype=coeffs.dtype
+        )
+
+    return coeffs
+
+
+def prepare_contour(contour, dtype=float):
+    """Sanitize a contour and calculate the arc length data used by the other functions.
+
+    The result can be passed instead of the contour to
+    :py:func:`elliptic_fourier_descriptors`, :py:func:`calculate_dc_coefficients`
+    and :py:func:`extend_efd`, so that the contour is only prepared once.
+    Passing it with a different ``dtype`` than it was prepared with converts it.
+
+    :param numpy.ndarray contour: A contour array of size ``[M x 2]``,
+        or ``[M x 1 x 2]`` as returned by OpenCV.
+    :param dtype: The floating point type used throughout the computation.
+        Default is ``float``, i.e. ``numpy.float64``.
+    :type dtype: str or numpy.dtype
+    :return: The prepared contour.
+    :rtype: :py:class:`PreparedContour`
+
+    """
+    return _prepare_contour(contour, dtype)
+
+
+def extend_efd(
+    contour, coeffs, order, method="direct", chunk_size=None, max_memory=None
+):
+    """Extend an array of Fourier coefficients to a higher order.
+
+    Only the harmonics ``n + 1`` to ``order`` are calculated and appended to
+    the ``n`` existing ones, which is useful when a higher order is needed for
+    only a few of many contours.
+
+    :param contour: The contour the coefficients were calculated for, either as
+        a ``[M x 2]`` array or as prepared by :py:func:`prepare_contour`.
+    :type contour: numpy.ndarray or PreparedContour
+    :param numpy.ndarray coeffs: A ``[n x 4]`` array of unnormalized Fourier
+        coefficients, as returned by :py:func:`elliptic_fourier_descriptors`.
+    :param int order: The order of Fourier coefficients to extend to.
+    :param str method: How the harmonics are evaluated, ``"direct"`` or
+        ``"recurrence"``; see :py:func:`elliptic_fourier_descriptors`.
+    :param int chunk_size: The number of segments processed per block;
+        see :py:func:`elliptic_fourier_descriptors`.
+    :param int max_memory: An alternative to ``chunk_size``;
+        see :py:func:`elliptic_fourier_descriptors`.
+    :return: A ``[order x 4]`` array of Fourier coefficients, starting with ``coeffs``.
+    :rtype: :py:class:`numpy.ndarray`
+
+    """
+    coeffs = np.asarray(coeffs)
+    if coeffs.ndim != 2 or coeffs.shape[1] != 4:
+        raise ValueError("Coefficient array must be of shape [n x 4].")
+    if order <= coeffs.shape[0]:
+        return coeffs[:order].copy()
+
+    prepared = _prepare_contour(contour, coeffs.dtype)
+    new_coeffs = _efd_coefficients(
+        prepared,
+        np.arange(coeffs.shape[0] + 1, order + 1),
+        method=method,
+        chunk_size=_chunk_size(
+            order - coeffs.shape[0], chunk_size, max_memory, prepared.dtype.itemsize
+        ),
+    )
+    return np.concatenate([coeffs, new_coeffs])
+
+
+def pack_contours(contours):
+    """Pack a sequence of contours into flat coordinate and offset arrays.
+
+    :param contours: A sequence of ``K`` contour arrays of size ``[M_i x 2]``,
+        or ``[M_i x 1 x 2]`` as returned by OpenCV.
+    :type contours: list or tuple
+    :return: A ``[sum(M_i) x 2]`` coordinate array and a ``K + 1`` offset array,
+        where contour ``i`` is ``coordinates[offsets[i]:offsets[i + 1]]``.
+    :rtype: (:py:class:`numpy.ndarray`, :py:class:`numpy.ndarray`)
+
+    """
+    contours = [_contour_array(contour) for contour in contours]
+
+    offsets = np.zeros(len(contours) + 1, dtype=np.intp)
+    np.cumsum([contour.shape[0] for contour in contours], out=offsets[1:])
+    coordinates = np.empty((offsets[-1], 2))
+    if contours:
+        np.concatenate(contours, out=coordinates)
+
+    return coordinates, offsets
+
+
+# The number of ``order x vertices`` harmonics computed per group of contours in
+# ``elliptic_fourier_descriptors_batch``, i.e. about 512 kB per temporary in
+# double precision, so that the harmonics are still cached when reduced.
+_BATCH_GROUP_SIZE = 2 ** 16
+
+
+def elliptic_fourier_descriptors_batch(
+    coordinates,
+    offsets,
+    order=10,
+    normalize=False,
+    return_transformation=False,
+    method="direct",
+    dtype=float,
+):
+    """Calculate elliptical Fourier descriptors for many contours at once.
+
+    The contours are given in packed form, see :py:func:`pack_contours`, and
+    are processed in groups of similar length, each in a single vectorized pass
+    with the per contour sums done as stacked matrix products. The result equals,
+    up to rounding, that of :py:func:`elliptic_fourier_descriptors` on every contour.
+
+    :param numpy.ndarray coordinates: A ``[sum(M_i) x 2]`` array with the
+        vertices of all contours stored back to back.
+    :param numpy.ndarray offsets: A ``K + 1`` array of offsets into ``coordinates``;
+        contour ``i`` is ``coordinates[offsets[i]:offsets[i + 1]]``.
+    :param int order: The order of Fourier coefficients to calculate.
+    :param bool normalize: If the coefficients should be normalized;
+        see references for details.
+    :param bool return_transformation: If the normalization parametres should be returned.
+        Default is ``False``.
+    :param str method: How the harmonics are evaluated, ``"direct"`` or
+        ``"recurrence"``; see :py:func:`elliptic_fourier_descriptors`.
+    :param dtype: The floating point type used throughout the computation.
+        Default is ``float``, i.e. ``numpy.float64``.
+    :type dtype: str or numpy.dtype
+    :return: A ``[K x order x 4]`` array of Fourier coefficients and optionally
+        ``K`` arrays of the transformation parametres ``scale``, ``psi_1`` and ``theta_1``.
+    :rtype: :py:class:`numpy.ndarray` or (:py:class:`numpy.ndarray`, tuple)
+
+    """
+    # Orders below one give no coefficients, as for a single contour.
+    order = max(order, 0)
+    batch = _prepare_segments_batch(coordinates, offsets, dtype)
+    dt, counts, segment_offsets = batch.dt, batch.counts, batch.segment_offsets
+    n_contours = counts.shape[0]
+
+    # Summing by parts turns the sums of tangents times harmonic differences over
+    # the segments into sums of tangent differences times harmonics over the
+    # vertices, as the harmonics are the same at both ends of a closed contour.
+    tangents = batch.dxy / dt.reshape((-1, 1))
+    firsts, lasts = segment_offsets[:-1], segment_offsets[1:] - 1
+    weights = np.empty_like(tangents)
+    np.subtract(tangents[:-1], tangents[1:], out=weights[1:])
+    weights[firsts] = tangents[lasts] - tangents[firsts]
+
+    orders = np.arange(1, order + 1, dtype=dt.dtype)
+    coeffs = np.empty((n_contours, order, 4), dtype=dt.dtype)
+    # Contours of similar length are grouped and padded with zero length segments
+    # to the longest one in the group. The arc lengths are summed along the rows,
+    # as for a single contour, and the harmonics reduced by stacked matrix products.
+    by_length = np.argsort(counts, kind="stable")
+    lengths = counts[by_length]
+    length_offsets = np.zeros(n_contours + 1, dtype=np.intp)
+    np.cumsum(lengths, out=length_offsets[1:])
+    group_size = max(_BATCH_GROUP_SIZE // max(order, 1), 1)
+    for start, stop in _balanced_ranges(length_offsets, group_size):
+        group = by_length[start:stop]
+        columns = np.arange(lengths[stop - 1])
+        valid = columns < counts[group].reshape((-1, 1))
+        segment = (segment_offsets[group].reshape((-1, 1)) + columns)[valid]
+        group_dt = np.zeros(valid.shape, dtype=dt.dtype)
+        group_dt[valid] = dt[segment]
+        group_weights = np.zeros(valid.shape + (2,), dtype=dt.dtype)
+        group_weights[valid] = weights[segment]
+
+        # The arc length at the start of every segment, and the perimeters.
+        group_t = np.zeros(valid.shape, dtype=dt.dtype)
+        np.cumsum(group_dt[:, :-1], axis=1, out=group_t[:, 1:])
+        group_T = group_t[:, -1] + group_dt[:, -1]
+        phi = (2 * np.pi * group_t) / group_T.reshape((-1, 1))
+
+        cos_phi, sin_phi = _harmonics(phi.ravel(), orders, method)
+        with _stage("reduce"):
+            # Columns a and c come from the cosine terms, b and d from the sine terms.
+            shape = (order,) + valid.shape
+            group_coeffs = np.empty((group.shape[0], order, 4), dtype=dt.dtype)
+            group_coeffs[:, :, 0::2] = np.matmul(
+                cos_phi.reshape(shape).transpose((1, 0, 2)), group_weights
+            )
+            group_coeffs[:, :, 1::2] = np.matmul(
+                sin_phi.reshape(shape).transpose((1, 0, 2)), group_weights
+            )
+            consts = group_T.reshape((-1, 1)) / (2 * orders * orders * np.pi * np.pi)
+            group_coeffs *= consts.reshape(consts.shape + (1,))
+            coeffs[group] = group_coeffs
+
+    if normalize:
+        coeffs = normalize_efd(
+            coeffs, return_transformation=return_transformation, dtype=coeffs.dtype
+        )
+
+    return coeffs
+
+
+def _batch_ranges(n_contours, batch_size):
+    """Return the ``(start, stop)`` contour ranges of batches of ``batch_size``."""
+    if batch_size < 1:
+        raise ValueError("The batch size must be at least one.")
+    return [
+        (start, min(start + batch_size, n_contours))
+        for start in _range(0, n_contours, batch_size)
+    ]
+
+
+# The number of ``order x vertices`` harmonics a thread task computes by default,
+# i.e. about 2 MB per temporary in double precision; large enough for the
+# NumPy calls, which release the GIL, to dominate the Python overhead.
+_THREAD_TASK_SIZE = 2 ** 18
+
+
+def _balanced_ranges(offsets, size):
+    """Return contour ranges of about ``size`` vertices each, split between contours."""
+    n_contours = offsets.shape[0] - 1
+    cuts = np.searchsorted(offsets, np.arange(size, offsets[-1], size))
+    cuts = np.unique(cuts[(cuts > 0) & (cuts < n_contours)])
+    bounds = [0] + cuts.tolist() + [n_contours]
+    return [(start, stop) for start, stop in zip(bounds, bounds[1:]) if stop > start]
+
+
+def _packed_contours(contours, offsets, dtype):
+    """Return the coordinate and offset arrays of packed or unpacked contours."""
+    if offsets is None:
+        contours, offsets = pack_contours(contours)
+    return _packed_arrays(contours, offsets, dtype)
+
 
-    phi = (2 * np.pi * t) / T
+def _efd_batch_range(coordinates, offsets, start, stop, out, parameters):
+    """Write the coefficients of contours ``start`` to ``stop`` into ``out``."""
+    first, last = offsets[start], offsets[stop]
+    out[start:stop] = elliptic_fourier_descriptors_batch(
+        coordinates[first:last], offsets[start : stop + 1] - first, **parameters
+    )
+
+
+# The shared memory blocks and arrays of a worker process of
+# ``bulk_elliptic_fourier_descriptors``, set by ``_bulk_worker_init``.
+_bulk_worker_state = {}
 
-    orders = np.arange(1, order + 1)
-    consts = T / (2 * orders * orders * np.pi * np.pi)
-    phi = phi * orders.reshape((order, -1))
 
-    d_cos_phi = np.cos(phi[:, 1:]) - np.cos(phi[:, :-1])
-    d_sin_phi = np.sin(phi[:, 1:]) - np.sin(phi[:, :-1])
+def _bulk_worker_init(blocks, parameters):
+    """Attach a worker process to the shared memory blocks of the input and output."""
+    from multiprocessing import shared_memory
 
-    a = consts * np.sum((dxy[:, 0] / dt) * d_cos_phi, axis=1)
-    b = consts * np.sum((dxy[:, 0] / dt) * d_sin_phi, axis=1)
-    c = consts * np.sum((dxy[:, 1] / dt) * d_cos_phi, axis=1)
-    d = consts * np.sum((dxy[:, 1] / dt) * d_sin_phi, axis=1)
+    arrays = []
+    for name, shape, dtype in blocks:
+        block = shared_memory.SharedMemory(name=name)
+        arrays.append(np.ndarray(shape, dtype=dtype, buffer=block.buf))
+        _bulk_worker_state.setdefault("blocks", []).append(block)
+    _bulk_worker_state["arrays"] = arrays
+    _bulk_worker_state["parameters"] = parameters
 
-    coeffs = np.concatenate(
-        [
-            a.reshape((order, 1)),
-            b.reshape((order, 1)),
-            c.reshape((order, 1)),
-            d.reshape((order, 1)),
-        ],
-        axis=1,
+
+def _bulk_worker_task(start, stop):
+    """Compute one batch of contours in a worker process."""
+    coordinates, offsets, out = _bulk_worker_state["arrays"]
+    _efd_batch_range(
+        coordinates, offsets, start, stop, out, _bulk_worker_state["parameters"]
     )
 
-    if normalize:
-        coeffs = normalize_efd(coeffs, return_transformation=return_transformation)
 
-    return coeffs
+def bulk_elliptic_fourier_descriptors(
+    contours,
+    offsets=None,
+    order=10,
+    normalize=False,
+    method="direct",
+    dtype=float,
+    workers=None,
+    batch_size=256,
+    mp_context=None,
+):
+    """Calculate elliptical Fourier descriptors for many contours in worker processes.
+
+    The contours are split into batches of ``batch_size`` contours, each
+    computed by :py:func:`elliptic_fourier_descriptors_batch` in a pool of
+    ``workers`` processes. The coordinates and the resulting coefficients are
+    kept in :py:mod:`multiprocessing.shared_memory` blocks, so that only the
+    ranges of the batches are sent to the workers, and the workers write their
+    coefficients directly into the result. The result does not depend on the
+    number of workers or the order in which the batches complete.
+
+    The harmonics of a batch are computed in groups of about ``2 ** 16``
+    ``order x vertices`` elements, so that their temporaries take about 1 MB,
+    whatever the batch size and order. The packed segments and weights of a
+    batch take about 7 floats per vertex, e.g. about 18 MB for batches of 256
+    contours of 1000 vertices at order 10.
+
+    :param contours: A sequence of ``K`` contour arrays of size ``[M_i x 2]``,
+        or the ``[sum(M_i) x 2]`` packed coordinates if ``offsets`` is given.
+    :type contours: list or numpy.ndarray
+    :param numpy.ndarray offsets: The ``K + 1`` offsets of packed contours,
+        see :py:func:`pack_contours`. Default is ``None``, i.e. a sequence of contours.
+    :param int order: The order of Fourier coefficients to calculate.
+    :param bool normalize: If the coefficients should be normalized;
+        see references for details.
+    :param str method: How the harmonics are evaluated, ``"direct"`` or
+        ``"recurrence"``; see :py:func:`elliptic_fourier_descriptors`.
+    :param dtype: The floating point type used throughout the computation.
+        Default is ``float``, i.e. ``numpy.float64``.
+    :type dtype: str or numpy.dtype
+    :param int workers: The number of worker processes. Default is ``None``, i.e.
+        the number of CPUs. With one worker, or a single batch, the contours are
+        computed in the calling process.
+    :param int batch_size: The number of contours computed by one task.
+        Default is ``256``.
+    :param mp_context: The :py:mod:`multiprocessing` context used for starting
+        the workers. Default is ``None``, i.e. the default context.
+    :return: A ``[K x order x 4]`` array of Fourier coefficients.
+    :rtype: :py:class:`numpy.ndarray`
+
+    """
+    coordinates, offsets = _packed_contours(contours, offsets, dtype)
+    n_contours = offsets.shape[0] - 1
+    ranges = _batch_ranges(n_contours, batch_size)
+    parameters = dict(order=order, normalize=normalize, method=method, dtype=dtype)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(ranges))
+
+    if workers <= 1:
+        coeffs = np.empty((n_contours, order, 4), dtype=coordinates.dtype)
+        for start, stop in ranges:
+            _efd_batch_range(coordinates, offsets, start, stop, coeffs, parameters)
+        return coeffs
+
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing import shared_memory
+
+    inputs = (coordinates, offsets)
+    shapes = [coordinates.shape, offsets.shape, (n_contours, order, 4)]
+    dtypes = [coordinates.dtype, offsets.dtype, coordinates.dtype]
+    blocks, arrays = [], []
+    try:
+        for shape, dtype in zip(shapes, dtypes):
+            nbytes = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+            blocks.append(shared_memory.SharedMemory(create=True, size=nbytes))
+            arrays.append(np.ndarray(shape, dtype=dtype, buffer=blocks[-1].buf))
+        for array, values in zip(arrays, inputs):
+            array[...] = values
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=mp_context,
+            initializer=_bulk_worker_init,
+            initargs=(
+                [(b.name, a.shape, a.dtype.str) for b, a in zip(blocks, arrays)],
+                parameters,
+            ),
+        ) as executor:
+            starts, stops = zip(*ranges)
+            # Consume the results to raise the exceptions of the workers.
+            for _ in executor.map(_bulk_worker_task, starts, stops):
+                pass
+
+        return arrays[2].copy()
+    finally:
+        del arrays
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+
+def map_elliptic_fourier_descriptors(
+    contours,
+    offsets=None,
+    order=10,
+    normalize=False,
+    method="direct",
+    dtype=float,
+    workers=None,
+    batch_size=None,
+    out=None,
+    executor=None,
+):
+    """Calculate elliptical Fourier descriptors for many contours in a thread pool.
+
+    The contours are split into tasks computed by
+    :py:func:`elliptic_fourier_descriptors_batch` in threads of the calling
+    process. NumPy releases the GIL in the trigonometric functions and sums
+    taking most of the time of a task, so that the threads run in parallel.
+    By default, the tasks are sized to about ``2 ** 18 / order`` vertices,
+    keeping the overhead spent holding the GIL small. Every task writes its
+    coefficients into its own slice of the result, without any locking.
+
+    :param contours: A sequence of ``K`` contour arrays of size ``[M_i x 2]``,
+        or the ``[sum(M_i) x 2]`` packed coordinates if ``offsets`` is given.
+    :type contours: list or numpy.ndarray
+    :param numpy.ndarray offsets: The ``K + 1`` offsets of packed contours,
+        see :py:func:`pack_contours`. Default is ``None``, i.e. a sequence of contours.
+    :param int order: The order of Fourier coefficients to calculate.
+    :param bool normalize: If the coefficients should be normalized;
+        see references for details.
+    :param str method: How the harmonics are evaluated, ``"direct"`` or
+        ``"recurrence"``; see :py:func:`elliptic_fourier_descriptors`.
+    :param dtype: The floating point type used throughout the computation.
+        Default is ``float``, i.e. ``numpy.float64``.
+    :type dtype: str or numpy.dtype
+    :param int workers: The number of threads of the pool created for the call.
+        Default is ``None``, i.e. the number of CPUs.
+    :param int batch_size: The number of contours computed by one task.
+        Default is ``None``, i.e. tasks of a similar number of vertices.
+    :param numpy.ndarray out: A preallocated ``[K x order x 4]`` array of the
+        given ``dtype`` to write the coefficients to. Default is ``None``,
+        i.e. a new array.
+    :param executor: An executor to run the tasks in, e.g. a thread pool shared
+        by the requests of a service, instead of creating one for the call.
+    :type executor: concurrent.futures.Executor
+    :return: The ``[K x order x 4]`` array of Fourier coefficients, i.e. ``out``
+        if given.
+    :rtype: :py:class:`numpy.ndarray`
+
+    """
+    coordinates, offsets = _packed_contours(contours, offsets, dtype)
+    n_contours = offsets.shape[0] - 1
+    shape = (n_contours, order, 4)
+    if out is None:
+        out = np.empty(shape, dtype=coordinates.dtype)
+    elif out.shape != shape or out.dtype != coordinates.dtype:
+        raise ValueError(
+            "The output array must be of shape {0} and dtype {1}.".format(
+                shape, coordinates.dtype
+            )
+        )
+
+    if batch_size is None:
+        ranges = _balanced_ranges(offsets, max(_THREAD_TASK_SIZE // max(order, 1), 1))
+    else:
+        ranges = _batch_ranges(n_contours, batch_size)
+    parameters = dict(order=order, normalize=normalize, method=method, dtype=dtype)
+
+    def task(bounds):
+        _efd_batch_range(coordinates, offsets, bounds[0], bounds[1], out, parameters)
+
+    if executor is None:
+        if workers is None:
+            workers = os.cpu_count() or 1
+        with ThreadPoolExecutor(max_workers=max(min(workers, len(ranges)), 1)) as pool:
+            # Consume the results to raise the exceptions of the tasks.
+            for _ in pool.map(task, ranges):
+                pass
+    else:
+        for _ in executor.map(task, ranges):
+            pass
+    return out
+
+
+def _efd_requests(contours, order, normalize, method, dtype):
+    """Return the coefficients, or the exception, for each of a batch of contours.
+
+    The contours are computed together by :py:func:`elliptic_fourier_descriptors_batch`,
+    or one at a time if that fails, so that one invalid contour does not fail
+    the others.
+
+    """
+    try:
+        coordinates, offsets = pack_contours(contours)
+        coeffs = elliptic_fourier_descriptors_batch(
+            coordinates, offsets, order, normalize, method=method, dtype=dtype
+        )
+        return list(coeffs)
+    except ValueError:
+        results = []
+        for contour in contours:
+            try:
+                results.append(
+                    elliptic_fourier_descriptors(
+                        contour, order, normalize, method=method, dtype=dtype
+                    )
+                )
+            except Exception as exception:
+                results.append(exception)
+        return results
+
+
+class DescriptorBatcher(object):
+    """Gathers concurrent asynchronous requests into batch computations.
+
+    Requests arriving within ``max_delay`` seconds of the first pending request
+    with the same parametres are computed together by
+    :py:func:`elliptic_fourier_descriptors_batch`, in ``executor``, without
+    blocking the event loop. A batch is started early once it holds
+    ``max_batch_size`` requests. Each request receives its own coefficients.
+
+    .. code:: python
+
+        batcher = DescriptorBatcher(max_batch_size=128, max_delay=0.005)
+
+        async def handle(contour):
+            coeffs = await batcher.submit(contour, order=10, normalize=True)
+
+    A batcher is used from a single event loop at a time;
+    see :py:func:`efd_async` for a default batcher of the running loop.
+
+    :param int max_batch_size: The largest number of requests in a batch.
+        Default is ``256``.
+    :param float max_delay: The longest time in seconds a request waits for other
+        requests to batch with. Default is ``0.002``.
+    :param executor: The executor to run the batches in. Default is ``None``,
+        i.e. the default executor of the event loop.
+    :type executor: concurrent.futures.Executor
+
+    """
+
+    def __init__(self, max_batch_size=256, max_delay=0.002, executor=None):
+        if max_batch_size < 1:
+            raise ValueError("The batch size must be at least one.")
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.executor = executor
+        self._pending = {}
+        self._timers = {}
+
+    async def submit(
+        self, contour, order=10, normalize=False, method="direct", dtype=float
+    ):
+        """Calculate the elliptical Fourier descriptors of a contour in a batch.
+
+        :param numpy.ndarray contour: A contour array of size ``[M x 2]``.
+        :param int order: The order of Fourier coefficients to calculate.
+        :param bool normalize: If the coefficients should be normalized;
+            see references for details.
+        :param str method: How the harmonics are evaluated, ``"direct"`` or
+            ``"recurrence"``; see :py:func:`elliptic_fourier_descriptors`.
+        :param dtype: The floating point type used throughout the computation.
+            Default is ``float``, i.e. ``numpy.float64``.
+        :type dtype: str or numpy.dtype
+        :return: A ``[order x 4]`` array of Fourier coefficients.
+        :rtype: :py:class:`numpy.ndarray`
+
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        key = (order, normalize, method, _float_dtype(dtype).str)
+        future = loop.create_future()
+        pending = self._pending.setdefault(key, [])
+        pending.append((contour, future))
+        if len(pending) >= self.max_batch_size:
+            self._flush(key)
+        elif len(pending) == 1:
+            self._timers[key] = loop.call_later(self.max_delay, self._flush, key)
+        return await future
+
+    def flush(self):
+        """Start computing all pending requests, without waiting for more."""
+        for key in list(self._pending):
+            self._flush(key)
+
+    def _flush(self, key):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        requests = self._pending.pop(key, [])
+        if not requests:
+            return
+        contours = [contour for contour, _ in requests]
+        futures = [future for _, future in requests]
+        loop = futures[0].get_loop()
+        batch = loop.run_in_executor(self.executor, _efd_requests, contours, *key)
+        batch.add_done_callback(functools.partial(self._resolve, futures))
+
+    @staticmethod
+    def _resolve(futures, batch):
+        if batch.cancelled() or batch.exception() is not None:
+            for future in futures:
+                if not future.done():
+                    if batch.cancelled():
+                        future.cancel()
+                    else:
+                        future.set_exception(batch.exception())
+            return
+        for future, result in zip(futures, batch.result()):
+            # Requests cancelled while waiting are skipped.
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result.copy())
+
+
+# The default batcher of each event loop, used by ``efd_async``.
+_default_batchers = weakref.WeakKeyDictionary()
+
+
+async def efd_async(
+    contour, order=10, normalize=False, method="direct", dtype=float, batcher=None
+):
+    """Calculate elliptical Fourier descriptors without blocking the event loop.
+
+    Concurrent calls are gathered into batch computations by a
+    :py:class:`DescriptorBatcher`, by default one created for the running
+    event loop with the default batch size and delay.
+
+    .. code:: python
+
+        coeffs = await efd_async(contour, order=10, normalize=True)
+
+    :param numpy.ndarray contour: A contour array of size ``[M x 2]``.
+    :param int order: The order of Fourier coefficients to calculate.
+    :param bool normalize: If the coefficients should be normalized;
+        see references for details.
+    :param str method: How the harmonics are evaluated, ``"direct"`` or
+        ``"recurrence"``; see :py:func:`elliptic_fourier_descriptors`.
+    :param dtype: The floating point type used throughout the computation.
+        Default is ``float``, i.e. ``numpy.float64``.
+    :type dtype: str or numpy.dtype
+    :param DescriptorBatcher batcher: The batcher to submit the request to.
+        Default is ``None``, i.e. the default batcher of the running loop.
+    :return: A ``[order x 4]`` array of Fourier coefficients.
+    :rtype: :py:class:`numpy.ndarray`
+
+    """
+    if batcher is None:
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        batcher = _default_batchers.get(loop)
+        if batcher is None:
+            batcher = _default_batchers[loop] = DescriptorBatcher()
+    return await batcher.submit(contour, order, normalize, method, dtype)
 
 
-def normalize_efd(coeffs, size_invariant=True, return_transformation=False):
+@_profiled("normalize")
+def normalize_efd(
+    coeffs, size_invariant=True, return_transformation=False, dtype=float
+):
     """Normalizes an array of Fourier coefficients.
 
     See [#a]_ and [#b]_ for details.
 
-    :param numpy.ndarray coeffs: A ``[n x 4]`` Fourier coefficient array.
+    A stack of coefficient arrays is normalized in one vectorized operation,
+    with the normalization parametres determined for each of them.
+
+    :param numpy.ndarray coeffs: A ``[n x 4]`` Fourier coefficient array,
+        or a ``[K x n x 4]`` stack of them.
     :param bool size_invariant: If size invariance normalizing should be done as well.
         Default is ``True``.
     :param bool return_transformation: If the normalization parametres should be returned.
         Default is ``False``.
+    :param dtype: The floating point type used throughout the computation.
+        Default is ``float``, i.e. ``numpy.float64``.
+    :type dtype: str or numpy.dtype
     :return: The normalized ``[n x 4]`` Fourier coefficient array and optionally the
-        transformation parametres ``scale``, :math:`psi_1` (rotation) and :math:`theta_1` (phase)
+        transformation parametres ``scale``, :math:`psi_1` (rotation) and :math:`theta_1` (phase).
+        For a ``[K x n x 4]`` input, the normalized stack and ``K`` arrays of parametres.
     :rtype: :py:class:`numpy.ndarray` or (:py:class:`numpy.ndarray`, (float, float, float))
 
     """
+    coeffs = np.asarray(coeffs, dtype=_float_dtype(dtype))
+    if coeffs.ndim not in (2, 3) or coeffs.shape[-1] != 4:
+        raise ValueError("Coefficient array must be of shape [n x 4] or [K x n x 4].")
+    coeffs = np.ascontiguousarray(coeffs)
+    first = coeffs[..., 0, :]
+
     # Make the coefficients have a zero phase shift from
     # the first major axis. Theta_1 is that shift angle.
     theta_1 = 0.5 * np.arctan2(
-        2 * ((coeffs[0, 0] * coeffs[0, 1]) + (coeffs[0, 2] * coeffs[0, 3])),
+        2 * ((first[..., 0] * first[..., 1]) + (first[..., 2] * first[..., 3])),
         (
-            (coeffs[0, 0] ** 2)
-            - (coeffs[0, 1] ** 2)
-            + (coeffs[0, 2] ** 2)
-            - (coeffs[0, 3] ** 2)
+            (first[..., 0] ** 2)
+            - (first[..., 1] ** 2)
+            + (first[..., 2] ** 2)
+            - (first[..., 3] ** 2)
         ),
     )
-    # Rotate all coefficients by theta_1.
-    # Reshape the coefficients from a shape (N, 4) array into
-    # an (N, 2, 2) array - i.e. N 2x2 matrices
-    coeff_matrices = coeffs.reshape(-1, 2, 2)
-
-    # We want to rotate the first harmonic by theta_1, the second by 2*theta_1 etc.
-    # We can define an array of rotation matrices and then use numpy vector
-    # operations to rotate all of our 2x2 coefficient matrices in a vectorised way
-    indices = np.arange(1, coeffs.shape[0] + 1)  # 1, 2, 3, ..., N
-    cos, sin = np.cos(indices * theta_1), np.sin(indices * theta_1)
-    theta_rotations = np.stack(
-        [
-            np.stack([cos, -sin], axis=1),
-            np.stack([sin, cos], axis=1),
-        ],
-        axis=1,
-    )
-    coeff_matrices = np.matmul(coeff_matrices, theta_rotations)
-    coeffs = coeff_matrices.reshape(-1, 4)
-
+    # Rotate all coefficients by theta_1; the first harmonic by theta_1, the
+    # second by 2*theta_1 etc. With the rows of the 2x2 coefficient matrices
+    # [[a, b], [c, d]] as the complex numbers a + ib and c + id, the rotation
+    # by [[cos, -sin], [sin, cos]] from the right is a product with exp(-i angle).
+    harmonics = coeffs.view(np.result_type(coeffs.dtype, np.complex64))
+    indices = np.arange(1, coeffs.shape[-2] + 1, dtype=coeffs.dtype)  # 1, 2, ..., N
+    rotations = np.exp(-1j * np.multiply.outer(theta_1, indices))
+    harmonics = harmonics * rotations[..., np.newaxis]
 
     # Make the coefficients rotation invariant by rotating so that
     # the semi-major axis is parallel to the x-axis.
-    psi_1 = np.arctan2(coeffs[0, 2], coeffs[0, 0])
-    if psi_1 < 0: 
-        psi_1 += np.pi # ensure the starting point is the first quadrant
+    psi_1 = np.arctan2(harmonics[..., 0, 1].real, harmonics[..., 0, 0].real)
+    # ensure the starting point is the first quadrant
+    psi_1 = np.where(psi_1 < 0, psi_1 + np.pi, psi_1)
 
-    psi_rotation_matrix = np.array(
-        [[np.cos(psi_1), np.sin(psi_1)], [-np.sin(psi_1), np.cos(psi_1)]]
-    )
-    # Rotate all coefficients by -psi_1.
-    coeffs = np.matmul(psi_rotation_matrix, coeffs.reshape(-1, 2, 2)).reshape(-1, 4)
+    # Rotate all coefficients by -psi_1, i.e. by [[cos, sin], [-sin, cos]] from
+    # the left.
+    cos, sin = np.cos(psi_1), np.sin(psi_1)
+    psi_rotations = np.empty(psi_1.shape + (2, 2), dtype=harmonics.dtype)
+    psi_rotations[..., 0, 0] = cos
+    psi_rotations[..., 0, 1] = -sin
+    psi_rotations[..., 1, 0] = sin
+    psi_rotations[..., 1, 1] = cos
+    harmonics = np.matmul(harmonics, psi_rotations)
+    coeffs = harmonics.view(coeffs.dtype)
 
-    # Ensure a counter-clockwise orientation for the contour
-    if (coeffs[0, 0] * coeffs[0, 3] - coeffs[0, 1] * coeffs[0, 2]) < 0:
-        coeffs[:, 1] *= -1
-        coeffs[:, 3] *= -1
+    # Ensure a counter-clockwise orientation for the contour, negating b and d.
+    first = coeffs[..., 0, :]
+    clockwise = (first[..., 0] * first[..., 3] - first[..., 1] * first[..., 2]) < 0
+    if coeffs.ndim == 3:
+        orientation = np.where(clockwise, -1, 1).astype(coeffs.dtype)
+        harmonics.imag *= orientation.reshape((-1, 1, 1))
+    elif clockwise:
+        np.conjugate(harmonics, out=harmonics)
 
-    size = coeffs[0, 0]
+    size = coeffs[..., 0, 0].copy()
     if size_invariant:
         # Obtain size-invariance by normalizing.
-        coeffs /= np.abs(size)
+        coeffs /= np.abs(size).reshape(size.shape + (1, 1))
+
+    if coeffs.ndim == 2:
+        size, psi_1, theta_1 = size[()], psi_1[()], theta_1[()]
 
     if return_transformation:
         return coeffs, (size, psi_1, theta_1)
@@ -179,59 +1470,1268 @@ def normalize_efd(coeffs, size_invariant=True, return_transformation=False):
         return coeffs
 
 
-def calculate_dc_coefficients(contour):
+def calculate_dc_coefficients(contour, dtype=float, backend=None):
     """Calculate the :math:`A_0` and :math:`C_0` coefficients of the elliptic Fourier series.
 
-    :param numpy.ndarray contour: A contour array of size ``[M x 2]``.
+    :param contour: A contour array of size ``[M x 2]``, or ``[M x 1 x 2]`` as
+        returned by OpenCV, or a prepared contour from :py:func:`prepare_contour`.
+    :type contour: numpy.ndarray or PreparedContour
+    :param dtype: The floating point type used throughout the computation.
+        Default is ``float``, i.e. ``numpy.float64``.
+    :type dtype: str or numpy.dtype
+    :param str backend: ``"numpy"`` or ``"numba"``; see :py:func:`set_backend`.
+        Default is ``None``, i.e. the backend set by :py:func:`set_backend`.
     :return: The :math:`A_0` and :math:`C_0` coefficients.
     :rtype: tuple
 
     """
-    contour, dxy, dt, t, T = _prepare_contour(contour)
+    if _check_backend(backend) == "numba":
+        contour = _loop_contour(contour, dtype)
+        A0, C0, T = _numba_kernels()[1](contour, np.finfo(contour.dtype).eps)
+        if T == 0:
+            raise ValueError(
+                "Contour must contain at least one non-zero-length segment."
+            )
+        return contour.dtype.type(A0), contour.dtype.type(C0)
+    return _dc_coefficients(_prepare_contour(contour, dtype))
+
 
-    xi = np.cumsum(dxy[:, 0]) - (dxy[:, 0] / dt) * t[1:]
-    A0 = (1 / T) * np.sum(((dxy[:, 0] / (2 * dt)) * np.diff(t ** 2)) + xi * dt)
-    delta = np.cumsum(dxy[:, 1]) - (dxy[:, 1] / dt) * t[1:]
-    C0 = (1 / T) * np.sum(((dxy[:, 1] / (2 * dt)) * np.diff(t ** 2)) + delta * dt)
+@_profiled("dc")
+def _dc_coefficients(prepared):
+    """Return the :math:`A_0` and :math:`C_0` coefficients of a prepared contour."""
+    dxy, dt, t, T = prepared.dxy, prepared.dt, prepared.t, prepared.T
+    tangents = prepared.tangents
+
+    # The xi and delta of both coordinates, as the columns of one array.
+    xi_delta = np.cumsum(dxy, axis=0) - tangents * t[1:].reshape((-1, 1))
+    A0, C0 = (1 / T) * np.sum(
+        (tangents * (np.diff(t ** 2) / 2).reshape((-1, 1)))
+        + xi_delta * dt.reshape((-1, 1)),
+        axis=0,
+    )
 
     # A0 and CO relate to the first point of the contour array as origin.
     # Adding those values to the coefficients to make them relate to true origin.
-    return contour[0, 0] + A0, contour[0, 1] + C0
+    x0, y0 = prepared.contour[0].astype(prepared.dtype)
+    return x0 + A0, y0 + C0
+
+
+#: The available computation backends, see :py:func:`set_backend`.
+BACKENDS = ("numpy", "numba")
+
+_backend = "numpy"
+
+
+def set_backend(backend):
+    """Set the backend used by functions called without a ``backend`` argument.
+
+    ``"numpy"`` is the vectorized NumPy implementation. ``"numba"`` runs
+    fused, compiled loops for :py:func:`elliptic_fourier_descriptors`,
+    :py:func:`calculate_dc_coefficients` and :py:func:`reconstruct_contour`,
+    which make a single pass over the contour without any temporary arrays.
+    It requires `Numba <https://numba.pydata.org/>`_, and compiles each loop
+    on its first use. Computations the fused loops do not cover, e.g.
+    ``method="fft"`` or ``order="auto"``, use the NumPy implementation.
+
+    :param str backend: One of :py:data:`BACKENDS`.
+    :raises ImportError: If choosing the ``"numba"`` backend without Numba installed.
+
+    """
+    global _backend
+    _backend = _check_backend(backend)
+
+
+def get_backend():
+    """Return the backend set by :py:func:`set_backend`, by default ``"numpy"``."""
+    return _backend
+
+
+def _check_backend(backend=None):
+    """Return the backend to use for an argument of ``backend``."""
+    if backend is None:
+        return _backend
+    if backend not in BACKENDS:
+        raise ValueError(
+            "Unknown backend {0!r}; expected one of {1}.".format(backend, BACKENDS)
+        )
+    if backend == "numba":
+        _numba_kernels()
+    return backend
+
+
+@functools.lru_cache(maxsize=None)
+def _numba_kernels():
+    """Return the compiled ``(efd, dc, reconstruct)`` loops of the numba backend."""
+    try:
+        import numba
+    except ImportError:
+        raise ImportError("The numba backend requires numba to be installed.")
+    jit = numba.njit(nogil=True)
+    return jit(_efd_loop), jit(_dc_loop), jit(_reconstruct_loop)
+
+
+def _efd_loop(contour, order, recurrence, eps, coeffs):
+    """Add the Fourier coefficients of a ``[M x 2]`` contour to ``coeffs``.
+
+    Makes one pass over the segments for the perimeter, and a second one
+    adding the terms of every segment to the ``[order x 4]`` coefficients,
+    keeping the harmonics of the previous vertex for the differences.
+    Returns the perimeter, which is zero if all segments have zero length.
+
+    """
+    n_vertices = contour.shape[0]
+    T = 0.0
+    for i in range(n_vertices):
+        j = (i + 1) % n_vertices
+        dx = contour[j, 0] - contour[i, 0]
+        dy = contour[j, 1] - contour[i, 1]
+        dt = np.sqrt(dx * dx + dy * dy)
+        if dt > eps:
+            T += dt
+    if T == 0.0:
+        return T
+
+    previous = np.empty((order, 2))
+    previous[:, 0] = 1.0
+    previous[:, 1] = 0.0
+    t = 0.0
+    for i in range(n_vertices):
+        j = (i + 1) % n_vertices
+        dx = contour[j, 0] - contour[i, 0]
+        dy = contour[j, 1] - contour[i, 1]
+        dt = np.sqrt(dx * dx + dy * dy)
+        if dt <= eps:
+            continue
+        t += dt
+        phi = (2 * np.pi * t) / T
+        tx, ty = dx / dt, dy / dt
+        cos_1, sin_1 = np.cos(phi), np.sin(phi)
+        cos_n, sin_n = 1.0, 0.0
+        for n in range(order):
+            if recurrence:
+                cos_n, sin_n = (
+                    cos_n * cos_1 - sin_n * sin_1,
+                    sin_n * cos_1 + cos_n * sin_1,
+                )
+            else:
+                cos_n, sin_n = np.cos((n + 1) * phi), np.sin((n + 1) * phi)
+            d_cos = cos_n - previous[n, 0]
+            d_sin = sin_n - previous[n, 1]
+            coeffs[n, 0] += tx * d_cos
+            coeffs[n, 1] += tx * d_sin
+            coeffs[n, 2] += ty * d_cos
+            coeffs[n, 3] += ty * d_sin
+            previous[n, 0] = cos_n
+            previous[n, 1] = sin_n
+
+    for n in range(order):
+        const = T / (2 * (n + 1) * (n + 1) * np.pi * np.pi)
+        for k in range(4):
+            coeffs[n, k] *= const
+    return T
+
+
+def _dc_loop(contour, eps):
+    """Return the :math:`A_0`, :math:`C_0` and perimeter of a ``[M x 2]`` contour."""
+    n_vertices = contour.shape[0]
+    A0, C0 = 0.0, 0.0
+    x, y = 0.0, 0.0
+    t = 0.0
+    for i in range(n_vertices):
+        j = (i + 1) % n_vertices
+        dx = contour[j, 0] - contour[i, 0]
+        dy = contour[j, 1] - contour[i, 1]
+        dt = np.sqrt(dx * dx + dy * dy)
+        if dt <= eps:
+            continue
+        tx, ty = dx / dt, dy / dt
+        d_t2 = ((t + dt) * (t + dt) - t * t) / 2
+        t += dt
+        x += dx
+        y += dy
+        A0 += tx * d_t2 + (x - tx * t) * dt
+        C0 += ty * d_t2 + (y - ty * t) * dt
+    if t == 0.0:
+        return 0.0, 0.0, t
+    return contour[0, 0] + A0 / t, contour[0, 1] + C0 / t, t
+
+
+def _reconstruct_loop(coeffs, locus, out):
+    """Evaluate a ``[K x n x 4]`` coefficient stack into the ``[K x P x 2]`` ``out``.
+
+    The harmonics of every point are obtained by the angle addition recurrence,
+    and shared by all shapes.
+
+    """
+    n_shapes, n_orders = coeffs.shape[0], coeffs.shape[1]
+    num_points = out.shape[1]
+    harmonics = np.empty((n_orders, 2))
+    for p in range(num_points):
+        phi = 2 * np.pi * p / (num_points - 1) if num_points > 1 else 0.0
+        cos_1, sin_1 = np.cos(phi), np.sin(phi)
+        cos_n, sin_n = 1.0, 0.0
+        for n in range(n_orders):
+            cos_n, sin_n = cos_n * cos_1 - sin_n * sin_1, sin_n * cos_1 + cos_n * sin_1
+            harmonics[n, 0] = cos_n
+            harmonics[n, 1] = sin_n
+        for k in range(n_shapes):
+            x, y = locus[k, 0], locus[k, 1]
+            for n in range(n_orders):
+                cos_n, sin_n = harmonics[n, 0], harmonics[n, 1]
+                x += coeffs[k, n, 0] * cos_n + coeffs[k, n, 1] * sin_n
+                y += coeffs[k, n, 2] * cos_n + coeffs[k, n, 3] * sin_n
+            out[k, p, 0] = x
+            out[k, p, 1] = y
+
+
+def _loop_contour(contour, dtype):
+    """Return a contour as the contiguous ``[M x 2]`` array taken by the loops."""
+    if isinstance(contour, PreparedContour):
+        contour = contour.contour
+    return np.ascontiguousarray(_contour_array(contour), dtype=_float_dtype(dtype))
+
+
+def _efd_numba(contour, order, method, dtype):
+    """Return the ``[order x 4]`` Fourier coefficients from the compiled loop."""
+    contour = _loop_contour(contour, dtype)
+    coeffs = np.zeros((order, 4))
+    eps = np.finfo(contour.dtype).eps
+    if _numba_kernels()[0](contour, order, method == "recurrence", eps, coeffs) == 0:
+        raise ValueError("Contour must contain at least one non-zero-length segment.")
+    return coeffs.astype(contour.dtype, copy=False)
+
+
+ContourDescription = namedtuple(
+    "ContourDescription",
+    ["locus", "coeffs", "normalized_coeffs", "scale", "psi_1", "theta_1"],
+)
+ContourDescription.__doc__ = """The result of :py:func:`describe_contour`.
+
+The fields are the :math:`A_0` and :math:`C_0` ``locus``, the ``[order x 4]``
+Fourier coefficients ``coeffs``, their normalized counterpart
+``normalized_coeffs`` and the normalization parametres ``scale``,
+``psi_1`` (rotation) and ``theta_1`` (phase).
+
+"""
+
+
+def describe_contour(
+    contour,
+    order=10,
+    size_invariant=True,
+    method="direct",
+    chunk_size=None,
+    max_memory=None,
+    dtype=float,
+):
+    """Calculate locus, Fourier coefficients and normalization of a contour.
+
+    Equivalent to calling :py:func:`calculate_dc_coefficients`,
+    :py:func:`elliptic_fourier_descriptors` and :py:func:`normalize_efd`
+    with ``return_transformation=True``, but with the contour only being
+    prepared once.
+
+    :param contour: A contour array of size ``[M x 2]``, or a prepared contour
+        from :py:func:`prepare_contour`.
+    :type contour: numpy.ndarray or PreparedContour
+    :param int order: The order of Fourier coefficients to calculate.
+    :param bool size_invariant: If size invariance normalizing should be done as well.
+        Default is ``True``.
+    :param str method: How the harmonics are evaluated, ``"direct"`` or
+        ``"recurrence"``; see :py:func:`elliptic_fourier_descriptors`.
+    :param int chunk_size: The number of segments processed per block;
+        see :py:func:`elliptic_fourier_descriptors`.
+    :param int max_memory: An alternative to ``chunk_size``;
+        see :py:func:`elliptic_fourier_descriptors`.
+    :param dtype: The floating point type used throughout the computation.
+        Default is ``float``, i.e. ``numpy.float64``.
+    :type dtype: str or numpy.dtype
+    :return: The locus, coefficients and normalization of the contour.
+    :rtype: :py:class:`ContourDescription`
+
+    """
+    prepared = _prepare_contour(contour, dtype)
+
+    locus = _dc_coefficients(prepared)
+    coeffs = _efd_coefficients(
+        prepared,
+        np.arange(1, order + 1),
+        method=method,
+        chunk_size=_chunk_size(order, chunk_size, max_memory, prepared.dtype.itemsize),
+    )
+    normalized_coeffs, (scale, psi_1, theta_1) = normalize_efd(
+        coeffs,
+        size_invariant=size_invariant,
+        return_transformation=True,
+        dtype=prepared.dtype,
+    )
+
+    return ContourDescription(locus, coeffs, normalized_coeffs, scale, psi_1, theta_1)
+
+
+CacheInfo = namedtuple(
+    "CacheInfo", ["hits", "misses", "evictions", "maxsize", "currsize", "nbytes"]
+)
+CacheInfo.__doc__ = """Statistics of a :py:class:`LRUCache`, as returned by ``info``."""
+
+
+def _nbytes(value):
+    """Return the number of bytes of the arrays in a (possibly nested) value."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    elif isinstance(value, (tuple, list)):
+        return sum(_nbytes(v) for v in value)
+    return 0
+
+
+class LRUCache(object):
+    """A bounded, thread-safe least recently used cache with hit and miss counters.
+
+    Entries are evicted, least recently used first, when there are more than
+    ``maxsize`` of them or when their arrays use more than ``max_bytes``.
+    Values whose arrays alone use more than ``max_bytes`` are not cached.
+
+    :param int maxsize: The maximum number of entries, or ``None`` for no limit.
+    :param int max_bytes: The maximum number of bytes of the cached arrays,
+        or ``None`` for no limit.
+
+    """
+
+    def __init__(self, maxsize=128, max_bytes=None):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._maxsize = maxsize
+        self._max_bytes = max_bytes
+        self._nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        """Return the value cached for ``key``, or ``default`` if there is none."""
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Cache ``value`` for ``key``, evicting entries if the limits are exceeded."""
+        nbytes = _nbytes(value)
+        with self._lock:
+            if key in self._entries:
+                self._nbytes -= _nbytes(self._entries.pop(key))
+            if self._max_bytes is not None and nbytes > self._max_bytes:
+                return
+            self._entries[key] = value
+            self._nbytes += nbytes
+            self._evict()
+
+    def resize(self, maxsize=None, max_bytes=None):
+        """Set new limits, evicting entries as needed; ``None`` means no limit."""
+        with self._lock:
+            self._maxsize = maxsize
+            self._max_bytes = max_bytes
+            self._evict()
+
+    def clear(self):
+        """Remove all entries and reset the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def info(self):
+        """Return the statistics and limits of the cache.
+
+        :rtype: :py:class:`CacheInfo`
+
+        """
+        with self._lock:
+            return CacheInfo(
+                self.hits,
+                self.misses,
+                self.evictions,
+                self._maxsize,
+                len(self._entries),
+                self._nbytes,
+            )
+
+    def _evict(self):
+        while self._entries and (
+            (self._maxsize is not None and len(self._entries) > self._maxsize)
+            or (self._max_bytes is not None and self._nbytes > self._max_bytes)
+        ):
+            _, value = self._entries.popitem(last=False)
+            self._nbytes -= _nbytes(value)
+            self.evictions += 1
+
+
+def _copy_result(value):
+    """Return a copy of the arrays in a (possibly nested) result."""
+    if isinstance(value, np.ndarray):
+        return value.copy()
+    elif isinstance(value, tuple):
+        return tuple(_copy_result(v) for v in value)
+    return value
+
+
+# Parameter types whose ``repr`` identifies their value.
+_KEY_SCALARS = (
+    type(None),
+    bool,
+    int,
+    float,
+    complex,
+    str,
+    bytes,
+    type,
+    np.generic,
+    np.dtype,
+)
+
+
+def _update_key(digest, value):
+    """Add a parameter value to a key digest, hashing arrays by their content."""
+    if isinstance(value, PreparedContour):
+        value = value.contour
+    if isinstance(value, np.ndarray):
+        if value.dtype.hasobject:
+            raise TypeError("Object arrays cannot be used in a cache key.")
+        value = np.ascontiguousarray(value)
+        digest.update(repr(("ndarray", value.shape, value.dtype.str)).encode("utf-8"))
+        digest.update(value.reshape(-1).view(np.uint8))
+    elif isinstance(value, (tuple, list, dict)):
+        digest.update(repr((type(value).__name__, len(value))).encode("utf-8"))
+        if isinstance(value, dict):
+            value = sorted(value.items(), key=lambda item: repr(item[0]))
+        for item in value:
+            _update_key(digest, item)
+    elif isinstance(value, _KEY_SCALARS):
+        digest.update(repr((type(value).__name__, value)).encode("utf-8"))
+    else:
+        raise TypeError(
+            "Values of type {0} cannot be used in a cache key.".format(
+                type(value).__name__
+            )
+        )
+
+
+def contour_key(contour, **parameters):
+    """Return a content hash of a contour array and the given parametres.
+
+    Contours with identical shape, dtype and bytes get the same key. The
+    parametres may be numbers, strings, types, arrays (hashed by their content
+    like the contour) and tuples, lists and dicts of these.
+
+    :param contour: A contour array, or a prepared contour from
+        :py:func:`prepare_contour`.
+    :type contour: numpy.ndarray or PreparedContour
+    :return: A hexadecimal digest.
+    :rtype: str
+    :raises TypeError: If a parameter is of any other type.
+
+    """
+    if isinstance(contour, PreparedContour):
+        contour = contour.contour
+    contour = np.ascontiguousarray(contour)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((contour.shape, contour.dtype.str)).encode("utf-8"))
+    digest.update(contour.view(np.uint8).reshape(-1))
+    _update_key(digest, parameters)
+    return digest.hexdigest()
+
+
+class DescriptorCache(LRUCache):
+    """A memory bounded cache of descriptors, keyed by the content of the contours.
+
+    Pass it as ``cache`` to :py:func:`elliptic_fourier_descriptors`, or use it
+    as a decorator on any function taking a contour as its first argument, with
+    the other arguments of the types accepted by :py:func:`contour_key`::
+
+        cache = DescriptorCache(max_bytes=2 ** 26)
+        coeffs = elliptic_fourier_descriptors(contour, order=20, cache=cache)
+
+        @cache
+        def features(contour, order=10):
+            ...
+
+    Results are copied when stored and when returned, so the cached entries
+    cannot be modified by the caller.
+
+    :param int maxsize: The maximum number of entries, or ``None`` for no limit.
+    :param int max_bytes: The maximum number of bytes of the cached arrays,
+        or ``None`` for no limit. Default is 64 MiB.
+
+    """
+
+    def __init__(self, maxsize=None, max_bytes=64 * 2 ** 20):
+        super(DescriptorCache, self).__init__(maxsize=maxsize, max_bytes=max_bytes)
+
+    key = staticmethod(contour_key)
+
+    def get(self, key, default=None):
+        """Return a copy of the value cached for ``key``, or ``default``."""
+        value = super(DescriptorCache, self).get(key)
+        return default if value is None else _copy_result(value)
+
+    def put(self, key, value):
+        """Cache a copy of ``value`` for ``key``."""
+        super(DescriptorCache, self).put(key, _copy_result(value))
+
+    def __call__(self, function):
+        return _memoize(self, function)
+
+
+def _memoize(cache, function):
+    """Wrap a function taking a contour first, looking its results up in ``cache``."""
+    name = "{0}.{1}".format(function.__module__, function.__name__)
+
+    @functools.wraps(function)
+    def wrapper(contour, *args, **kwargs):
+        key = cache.key(contour, function=name, args=args, kwargs=kwargs)
+        result = cache.get(key)
+        if result is None:
+            result = function(contour, *args, **kwargs)
+            cache.put(key, result)
+        return result
+
+    return wrapper
+
+
+def _value_layout(value):
+    """Return the layout of a disk cache value and its arrays and scalars.
+
+    The leaves are returned as ``(array, scalar)`` pairs, with the scalars
+    converted to 0-d arrays.
+
+    """
+    if isinstance(value, np.ndarray):
+        return ["a", list(value.shape)], [(value, False)]
+    elif isinstance(value, (np.generic, int, float, complex)):
+        return ["s"], [(np.asarray(value), True)]
+    elif type(value) is tuple:
+        layouts, leaves = [], []
+        for item in value:
+            layout, item_leaves = _value_layout(item)
+            layouts.append(layout)
+            leaves.extend(item_leaves)
+        return ["t", layouts], leaves
+    raise TypeError(
+        "Values of type {0} cannot be stored in a disk cache.".format(
+            type(value).__name__
+        )
+    )
+
+
+def _value_from_layout(values, layout, position=0):
+    """Return the value of ``layout`` starting at ``position`` and the end position."""
+    if layout[0] == "a":
+        size = int(np.prod(layout[1]))
+        array = values[position : position + size].reshape(layout[1])
+        return array, position + size
+    elif layout[0] == "s":
+        return values[position], position + 1
+    items = []
+    for item in layout[1]:
+        item, position = _value_from_layout(values, item, position)
+        items.append(item)
+    return tuple(items), position
+
+
+class DiskDescriptorCache(object):
+    """A persistent cache of descriptors in a directory of memory-mapped shards.
+
+    Cached arrays are appended to ``.npy`` shard files holding ``shard_size``
+    values each, one series of shards per dtype, and an index file maps the
+    keys of :py:func:`contour_key` to their location and layout. Cached results
+    are returned as read-only views of the memory-mapped shards, i.e. without
+    copying.
+
+    A value can be an array, a scalar, or a (nested) tuple of arrays and scalars,
+    like the coefficients and transformation parametres returned by
+    :py:func:`elliptic_fourier_descriptors`. The arrays and scalars of a value
+    must be of the same dtype, or the scalars exactly representable in the
+    dtype of the arrays, of the same kind.
+
+    It has the same interface as :py:class:`DescriptorCache`: pass it as
+    ``cache`` to :py:func:`elliptic_fourier_descriptors` or use it as a
+    decorator. New entries become persistent on :py:meth:`flush`, which is
+    also called by :py:meth:`close` and when leaving a ``with`` block.
+    A directory must only be written to by one process at a time.
+
+    :param str directory: The directory of the cache; created if missing.
+    :param int shard_size: The number of values per shard file.
+        Default is ``2 ** 20``, i.e. 8 MiB shards for ``float64``.
+
+    """
+
+    _INDEX = "index.tsv"
+
+    def __init__(self, directory, shard_size=2 ** 20):
+        self.directory = directory
+        self.shard_size = int(shard_size)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._shards = {}
+        self._writing = {}
+        self._pending = []
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        index = os.path.join(directory, self._INDEX)
+        if os.path.exists(index):
+            self._load_index(index)
+            # Continue filling the last shard of each dtype.
+            for shard, offset, size, _ in self._entries.values():
+                dtype, number = shard[: -len(".npy")].rsplit("-", 1)
+                end = offset + size
+                current = self._writing.get(dtype)
+                if current is None or (int(number), end) > current:
+                    self._writing[dtype] = (int(number), end)
+
+    key = staticmethod(contour_key)
+
+    def _load_index(self, index):
+        """Read the index, dropping an incomplete last record and malformed ones."""
+        with open(index, "rb") as f:
+            data = f.read()
+        complete = data.rfind(b"\n") + 1
+        if complete < len(data):
+            # An interrupted write; truncate it, so that new records start on
+            # a line of their own.
+            with open(index, "r+b") as f:
+                f.truncate(complete)
+        for line in data[:complete].split(b"\n")[:-1]:
+            try:
+                key, shard, offset, size, layout = line.decode("utf-8").split("\t")
+                entry = (shard, int(offset), int(size), json.loads(layout))
+            except ValueError:
+                continue
+            self._entries[key] = entry
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __call__(self, function):
+        return _memoize(self, function)
+
+    def _shard(self, name, mode="r"):
+        shard = self._shards.get(name)
+        if shard is None or (mode != "r" and shard.mode == "r"):
+            path = os.path.join(self.directory, name)
+            shard = np.load(path, mmap_mode=mode)
+            self._shards[name] = shard
+        return shard
+
+    def get(self, key, default=None):
+        """Return the value cached for ``key`` as read-only views, or ``default``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            name, offset, size, layout = entry
+            values = self._shard(name)[offset : offset + size].view(np.ndarray)
+            values.flags.writeable = False
+            return _value_from_layout(values, layout)[0]
+
+    def put(self, key, value):
+        """Store ``value``, an array, scalar or tuple of them.
+
+        :raises TypeError: If the value cannot be stored and returned unchanged.
+        :raises ValueError: If the key contains a tab or a line break.
+
+        """
+        if any(character in key for character in "\t\r\n"):
+            raise ValueError("Keys must not contain tabs or line breaks.")
+        layout, leaves = _value_layout(value)
+        dtypes = set(leaf.dtype for leaf, scalar in leaves if not scalar)
+        if not dtypes:
+            dtypes = set(leaf.dtype for leaf, _ in leaves) or {np.dtype(float)}
+        if len(dtypes) != 1:
+            raise TypeError("The arrays of a value must be of a single dtype.")
+        dtype = dtypes.pop()
+        if dtype.kind not in "biufc":
+            raise TypeError("Arrays of dtype {0} cannot be stored.".format(dtype))
+        for leaf, scalar in leaves:
+            if scalar and (
+                leaf.dtype.kind != dtype.kind
+                or not np.array_equal(leaf.astype(dtype), leaf, equal_nan=True)
+            ):
+                raise TypeError(
+                    "The scalar {0!r} cannot be stored as {1}.".format(leaf[()], dtype)
+                )
+        values = np.empty(sum(leaf.size for leaf, _ in leaves), dtype=dtype)
+        if leaves:
+            np.concatenate([leaf.reshape(-1) for leaf, _ in leaves], out=values)
+        if values.shape[0] > self.shard_size:
+            raise ValueError("The value does not fit into a shard.")
+
+        with self._lock:
+            if key in self._entries:
+                return
+            dtype_name = dtype.str.lstrip("<>=|")
+            current = self._writing.get(dtype_name)
+            if current is not None:
+                number, offset = current
+                name = "{0}-{1:05d}.npy".format(dtype_name, number)
+                # The shard may have been created with another shard size.
+                capacity = self._shard(name).shape[0]
+            if current is None or offset + values.shape[0] > capacity:
+                # Start a new shard.
+                number = 0 if current is None else number + 1
+                offset = 0
+                name = "{0}-{1:05d}.npy".format(dtype_name, number)
+                self._shards[name] = np.lib.format.open_memmap(
+                    os.path.join(self.directory, name),
+                    mode="w+",
+                    dtype=dtype,
+                    shape=(self.shard_size,),
+                )
+            shard = self._shard(name, mode="r+")
+            shard[offset : offset + values.shape[0]] = values
+            self._writing[dtype_name] = (number, offset + values.shape[0])
+
+            size = values.shape[0]
+            self._entries[key] = (name, offset, size, layout)
+            encoded = json.dumps(layout, separators=(",", ":"))
+            self._pending.append(
+                "\t".join([key, name, str(offset), str(size), encoded]) + "\n"
+            )
+
+    def flush(self):
+        """Write the new entries to disk, the shards before the index."""
+        with self._lock:
+            for shard in self._shards.values():
+                if shard.mode != "r":
+                    shard.flush()
+            if self._pending:
+                # All new records in a single append; a record cut off by an
+                # interruption is dropped by the next open.
+                data = "".join(self._pending).encode("utf-8")
+                descriptor = os.open(
+                    os.path.join(self.directory, self._INDEX),
+                    os.O_WRONLY | os.O_APPEND | os.O_CREAT,
+                    0o644,
+                )
+                try:
+                    while data:
+                        data = data[os.write(descriptor, data) :]
+                    os.fsync(descriptor)
+                finally:
+                    os.close(descriptor)
+                self._pending = []
+
+    def close(self):
+        """Flush the cache and release the memory-mapped shards."""
+        self.flush()
+        with self._lock:
+            self._shards.clear()
+
+    def info(self):
+        """Return the statistics of the cache.
 
+        :rtype: :py:class:`CacheInfo`
 
-def reconstruct_contour(coeffs, locus=(0, 0), num_points=300):
+        """
+        with self._lock:
+            nbytes = sum(
+                size * np.dtype(name.split("-")[0]).itemsize
+                for name, _, size, _ in self._entries.values()
+            )
+            return CacheInfo(
+                self.hits, self.misses, 0, None, len(self._entries), nbytes
+            )
+
+
+#: The cache of the sine and cosine bases used by :py:func:`reconstruct_contour`
+#: and :py:func:`plot_efd`, keyed by ``(order, num_points, dtype)``. It holds up to
+#: 16 bases and 64 MiB; larger bases are computed anew for every call.
+basis_cache = LRUCache(maxsize=16, max_bytes=64 * 2 ** 20)
+
+
+def _reconstruction_basis(order, num_points, dtype):
+    """Return the read-only ``[num_points x 2 order]`` cosine and sine basis.
+
+    Column ``n - 1`` holds :math:`cos(2 \\pi n t)` and column ``order + n - 1``
+    holds :math:`sin(2 \\pi n t)`, for ``t = numpy.linspace(0, 1, num_points)``.
+
+    """
+    key = (order, num_points, dtype.str)
+    basis = basis_cache.get(key)
+    if basis is None:
+        t = np.linspace(0, 1.0, num_points, dtype=dtype)
+        orders = np.arange(1, order + 1, dtype=dtype)
+        order_phases = 2 * np.pi * t.reshape(-1, 1) * orders.reshape(1, -1)
+        basis = np.concatenate([np.cos(order_phases), np.sin(order_phases)], axis=1)
+        basis.setflags(write=False)
+        basis_cache.put(key, basis)
+    return basis
+
+
+@_profiled("reconstruct")
+def reconstruct_contour(
+    coeffs, locus=(0, 0), num_points=300, dtype=float, method="direct", backend=None
+):
     """Returns the contour specified by the coefficients.
 
-    :param coeffs: A ``[n x 4]`` Fourier coefficient array.
+    A ``[K x n x 4]`` stack of coefficient arrays is reconstructed with one
+    matrix multiplication against a shared basis of sines and cosines.
+    For large ``num_points``, ``method="fft"`` instead places the coefficients
+    in a spectrum of length ``num_points - 1`` and evaluates it with an inverse
+    FFT, in :math:`O(P \\log P)` rather than :math:`O(n P)` time.
+
+    :param coeffs: A ``[n x 4]`` Fourier coefficient array, or a ``[K x n x 4]``
+        stack of them.
     :type coeffs: numpy.ndarray
     :param locus: The :math:`A_0` and :math:`C_0` elliptic locus in [#a]_ and [#b]_.
+        For a stack of coefficients, either a ``[K x 2]`` array or one locus for all.
     :type locus: list, tuple or numpy.ndarray
     :param num_points: The number of sample points used for reconstructing the contour from the EFD.
     :type num_points: int
-    :return: A list of x,y coordinates for the reconstructed contour.
+    :param dtype: The floating point type used throughout the computation.
+        Default is ``float``, i.e. ``numpy.float64``.
+    :type dtype: str or numpy.dtype
+    :param method: ``"direct"`` for evaluating the series on the sample points,
+        or ``"fft"`` for an inverse FFT. Both give the same points.
+        Default is ``"direct"``.
+    :type method: str
+    :param str backend: ``"numpy"`` or ``"numba"``, the latter for the ``"direct"``
+        method; see :py:func:`set_backend`. Default is ``None``, i.e. the backend
+        set by :py:func:`set_backend`.
+    :return: A list of x,y coordinates for the reconstructed contour, of size
+        ``[num_points x 2]``, or ``[K x num_points x 2]`` for a stack of coefficients.
     :rtype: numpy.ndarray
 
     """
-    t = np.linspace(0, 1.0, num_points)
-    # Append extra dimension to enable element-wise broadcasted multiplication
-    coeffs = coeffs.reshape(coeffs.shape[0], coeffs.shape[1], 1)
+    dtype = _float_dtype(dtype)
+    coeffs = np.asarray(coeffs, dtype=dtype)
+    if coeffs.ndim not in (2, 3) or coeffs.shape[-1] != 4:
+        raise ValueError("Coefficient array must be of shape [n x 4] or [K x n x 4].")
+    batched = coeffs.ndim == 3
+    if not batched:
+        coeffs = coeffs.reshape((1,) + coeffs.shape)
+    n_shapes, n_orders = coeffs.shape[:2]
+    locus = np.asarray(locus, dtype=dtype).reshape((-1, 1, 2))
+
+    if method not in ("direct", "fft"):
+        raise ValueError(
+            "Unknown method {0!r}; expected one of {1}.".format(
+                method, ("direct", "fft")
+            )
+        )
+    elif method == "fft" and num_points > 1:
+        reconstruction = _reconstruct_fft(coeffs, num_points) + locus
+        if not batched:
+            return reconstruction[0]
+        return reconstruction
+
+    if _check_backend(backend) == "numba":
+        reconstruction = np.empty((n_shapes, num_points, 2), dtype=dtype)
+        locus = np.ascontiguousarray(np.broadcast_to(locus[:, 0], (n_shapes, 2)))
+        _numba_kernels()[2](np.ascontiguousarray(coeffs), locus, reconstruction)
+        if not batched:
+            return reconstruction[0]
+        return reconstruction
 
-    orders = coeffs.shape[0]
-    orders = np.arange(1, orders + 1).reshape(-1, 1)
-    order_phases = 2 * orders * np.pi * t.reshape(1, -1)
+    basis = _reconstruction_basis(n_orders, num_points, dtype)
 
-    xt_all = coeffs[:, 0] * np.cos(order_phases) + coeffs[:, 1] * np.sin(order_phases)
-    yt_all = coeffs[:, 2] * np.cos(order_phases) + coeffs[:, 3] * np.sin(order_phases)
+    # Gather the coefficients of all shapes as the columns of a [2n x 2K] matrix,
+    # the cosine terms a and c on top of the sine terms b and d.
+    weights = np.concatenate([coeffs[:, :, 0::2], coeffs[:, :, 1::2]], axis=1)
+    weights = weights.transpose((1, 0, 2)).reshape((2 * n_orders, 2 * n_shapes))
 
-    xt_all = xt_all.sum(axis=0)
-    yt_all = yt_all.sum(axis=0)
-    xt_all = xt_all + np.ones((num_points,)) * locus[0]
-    yt_all = yt_all + np.ones((num_points,)) * locus[1]
+    reconstruction = np.dot(basis, weights).reshape((num_points, n_shapes, 2))
+    reconstruction = reconstruction.transpose((1, 0, 2)) + locus
 
-    reconstruction = np.stack([xt_all, yt_all], axis=1)
+    if not batched:
+        return reconstruction[0]
     return reconstruction
 
 
+def _reconstruct_fft(coeffs, num_points):
+    """Evaluate a ``[K x n x 4]`` coefficient stack on ``num_points`` by inverse FFT.
+
+    The points ``t = k / N``, ``N = num_points - 1``, are those of
+    ``numpy.linspace(0, 1, num_points)``, the last one coinciding with the first.
+    Harmonic ``m`` contributes ``Re((a_m - i b_m) exp(2 pi i m k / N))`` to ``x``,
+    so its complex coefficient is added to bin ``m mod N`` of the spectrum.
+
+    """
+    n_shapes, n_orders = coeffs.shape[:2]
+    n_samples = num_points - 1
+    spectrum = np.zeros(
+        (n_shapes, n_samples, 2), dtype=np.result_type(coeffs, np.complex64)
+    )
+    values = np.empty((n_shapes, n_orders, 2), dtype=spectrum.dtype)
+    values.real = coeffs[:, :, 0::2]
+    values.imag = -coeffs[:, :, 1::2]
+    if n_orders < n_samples:
+        spectrum[:, 1 : n_orders + 1] = values
+    else:
+        # Orders of at least the number of samples alias onto lower bins.
+        bins = np.arange(1, n_orders + 1) % n_samples
+        np.add.at(spectrum, (slice(None), bins), values)
+
+    samples = (n_samples * np.fft.ifft(spectrum, axis=1).real).astype(
+        coeffs.dtype, copy=False
+    )
+    return np.concatenate([samples, samples[:, :1]], axis=1)
+
+
+# The edges of a marching squares cell, between the pixel centres at its corners.
+_TOP, _RIGHT, _BOTTOM, _LEFT = 0, 1, 2, 3
+
+# The boundary segments of the 16 cell cases, as (start, end) edges, where bit
+# 1, 2, 4 and 8 of the case is set for a foreground top left, top right, bottom
+# right and bottom left pixel. The segments are oriented so that the foreground
+# is on their left in (row, column) coordinates, i.e. outer boundaries run
+# counter-clockwise and holes clockwise. The saddles 5 and 10 join diagonally
+# adjacent foreground pixels, i.e. objects are 8-connected.
+_CELL_SEGMENTS = np.array(
+    [
+        [[-1, -1], [-1, -1]],
+        [[_LEFT, _TOP], [-1, -1]],
+        [[_TOP, _RIGHT], [-1, -1]],
+        [[_LEFT, _RIGHT], [-1, -1]],
+        [[_RIGHT, _BOTTOM], [-1, -1]],
+        [[_RIGHT, _TOP], [_LEFT, _BOTTOM]],
+        [[_TOP, _BOTTOM], [-1, -1]],
+        [[_LEFT, _BOTTOM], [-1, -1]],
+        [[_BOTTOM, _LEFT], [-1, -1]],
+        [[_BOTTOM, _TOP], [-1, -1]],
+        [[_TOP, _LEFT], [_BOTTOM, _RIGHT]],
+        [[_BOTTOM, _RIGHT], [-1, -1]],
+        [[_RIGHT, _LEFT], [-1, -1]],
+        [[_RIGHT, _TOP], [-1, -1]],
+        [[_TOP, _LEFT], [-1, -1]],
+        [[-1, -1], [-1, -1]],
+    ],
+    dtype=np.intp,
+)
+
+# The row and column offsets of the first pixel (top or left) of each edge,
+# its case bit, and whether the edge is horizontal, i.e. between two columns.
+_EDGE_ROW = np.array([0, 0, 1, 0])
+_EDGE_COLUMN = np.array([0, 1, 0, 0])
+_EDGE_FIRST_PIXEL = np.array([1, 2, 8, 1])
+_EDGE_HORIZONTAL = np.array([True, False, True, False])
+
+
+def _segment_points(rows, columns, cases, edges, shape):
+    """Return keys of the points of the segments on ``edges`` of the given cells.
+
+    Every edge between two pixels of an image of ``shape`` has an index, and
+    the key of a point is twice that index, plus one if the object of the
+    segment is on the second pixel of the edge. Boundaries of two objects
+    meeting at an edge thus get different points.
+
+    """
+    height, width = shape
+    rows = rows + _EDGE_ROW[edges]
+    columns = columns + _EDGE_COLUMN[edges]
+    index = np.where(
+        _EDGE_HORIZONTAL[edges],
+        rows * (width - 1) + columns,
+        height * (width - 1) + rows * width + columns,
+    )
+    second = (cases & _EDGE_FIRST_PIXEL[edges]) == 0
+    return 2 * index + second
+
+
+def _point_coordinates(points, shape):
+    """Return the ``(row, column)`` coordinates of point keys, at the edge midpoints."""
+    height, width = shape
+    index = points // 2
+    n_horizontal = height * (width - 1)
+    horizontal = index < n_horizontal
+    coordinates = np.empty((points.shape[0], 2))
+    rows, columns = np.divmod(index[horizontal], width - 1)
+    coordinates[horizontal, 0] = rows
+    coordinates[horizontal, 1] = columns + 0.5
+    rows, columns = np.divmod(index[~horizontal] - n_horizontal, width)
+    coordinates[~horizontal, 0] = rows + 0.5
+    coordinates[~horizontal, 1] = columns
+    return coordinates
+
+
+def _link_segments(rows, columns, cases, shape):
+    """Link the boundary segments of the given marching squares cells into contours.
+
+    Each segment is linked to the one starting at its end point. The segments
+    of each closed contour are ordered by pointer jumping: every segment first
+    finds the lowest segment index of its contour, its start, and then its
+    distance to the end of the contour, in a logarithmic number of vectorized
+    steps. Returns the packed coordinates and offsets of the contours, ordered
+    by their first cell, and the index of that cell for each contour.
+
+    """
+    cells, starts, ends = [], [], []
+    for k in range(2):
+        has_segment = _CELL_SEGMENTS[cases, k, 0] >= 0
+        r, c, case = rows[has_segment], columns[has_segment], cases[has_segment]
+        cells.append(np.flatnonzero(has_segment))
+        starts.append(_segment_points(r, c, case, _CELL_SEGMENTS[case, k, 0], shape))
+        ends.append(_segment_points(r, c, case, _CELL_SEGMENTS[case, k, 1], shape))
+    order = np.argsort(np.concatenate(cells), kind="stable")
+    cells = np.concatenate(cells)[order]
+    starts = np.concatenate(starts)[order]
+    ends = np.concatenate(ends)[order]
+
+    n_segments = starts.shape[0]
+    if n_segments == 0:
+        return np.empty((0, 2)), np.zeros(1, dtype=np.intp), cells
+    by_start = np.argsort(starts)
+    following = by_start[np.searchsorted(starts, ends, sorter=by_start)]
+    n_steps = int(np.ceil(np.log2(n_segments))) + 1
+
+    first = np.arange(n_segments)
+    jump = following
+    for _ in _range(n_steps):
+        first = np.minimum(first, first[jump])
+        jump = jump[jump]
+
+    # Cut each contour before its first segment and rank the segments.
+    last = first[following] == following
+    jump = np.where(last, np.arange(n_segments), following)
+    remaining = (~last).astype(np.intp)
+    for _ in _range(n_steps):
+        remaining = remaining + remaining[jump]
+        jump = jump[jump]
+
+    order = np.lexsort((-remaining, first))
+    heads = np.flatnonzero(first == np.arange(n_segments))
+    offsets = np.zeros(heads.shape[0] + 1, dtype=np.intp)
+    np.cumsum(remaining[heads] + 1, out=offsets[1:])
+    return _point_coordinates(starts[order], shape), offsets, cells[heads]
+
+
+def _signed_areas(coordinates, offsets):
+    """Return the areas of packed ``(row, column)`` contours, negative for holes.
+
+    The area is positive for contours running counter-clockwise when displayed
+    as an image, i.e. with the rows downwards.
+
+    """
+    if offsets.shape[0] < 2:
+        return np.zeros(0)
+    following = np.arange(1, coordinates.shape[0] + 1)
+    following[offsets[1:] - 1] = offsets[:-1]
+    rows, columns = coordinates[:, 0], coordinates[:, 1]
+    cross = rows * columns[following] - rows[following] * columns
+    return 0.5 * np.add.reduceat(cross, offsets[:-1])
+
+
+def find_contours(mask):
+    """Trace the boundaries of the foreground of a binary image.
+
+    The boundaries are traced by marching squares at the midpoints between
+    foreground and background pixels, with diagonally adjacent foreground
+    pixels connected. The image is treated as surrounded by background, so that
+    all contours are closed. Outer boundaries run counter-clockwise and the
+    boundaries of holes clockwise, when displayed as an image.
+
+    :param numpy.ndarray mask: A two dimensional boolean image.
+    :return: The ``(row, column)`` coordinates of all contours and their offsets,
+        packed as by :py:func:`pack_contours`, in the raster order of their
+        first point. The first point is not repeated at the end of a contour.
+    :rtype: (:py:class:`numpy.ndarray`, :py:class:`numpy.ndarray`)
+
+    """
+    mask = np.asarray(mask, dtype=bool)
+    if mask.ndim != 2:
+        raise ValueError("Mask must be a two dimensional array.")
+    padded = np.pad(mask, 1).astype(np.uint8)
+    cases = (
+        padded[:-1, :-1]
+        | (padded[:-1, 1:] << 1)
+        | (padded[1:, 1:] << 2)
+        | (padded[1:, :-1] << 3)
+    )
+    rows, columns = np.nonzero((cases != 0) & (cases != 15))
+    coordinates, offsets, _ = _link_segments(
+        rows, columns, cases[rows, columns].astype(np.intp), padded.shape
+    )
+    return coordinates - 1, offsets
+
+
+def efd_from_mask(mask, order=10, normalize=False, method="direct", dtype=float):
+    """Calculate elliptical Fourier descriptors of the object in a binary image.
+
+    The outer boundary of the largest object is traced by :py:func:`find_contours`
+    and its coefficients and locus calculated, without building intermediate
+    lists of points.
+
+    :param numpy.ndarray mask: A two dimensional boolean image.
+    :param int order: The order of Fourier coefficients to calculate.
+    :param bool normalize: If the coefficients should be normalized;
+        see references for details.
+    :param str method: How the harmonics are evaluated;
+        see :py:func:`elliptic_fourier_descriptors`.
+    :param dtype: The floating point type used throughout the computation.
+        Default is ``float``, i.e. ``numpy.float64``.
+    :type dtype: str or numpy.dtype
+    :return: A ``[order x 4]`` array of Fourier coefficients and the
+        :math:`A_0` and :math:`C_0` locus, in ``(row, column)`` coordinates.
+    :rtype: (:py:class:`numpy.ndarray`, tuple)
+
+    """
+    coordinates, offsets = find_contours(mask)
+    if offsets.shape[0] < 2:
+        raise ValueError("Mask must contain at least one foreground pixel.")
+    # The boundary enclosing the largest area is always an outer one.
+    largest = np.argmax(_signed_areas(coordinates, offsets))
+    prepared = _prepare_contour(
+        coordinates[offsets[largest] : offsets[largest + 1]], dtype
+    )
+    coeffs = elliptic_fourier_descriptors(
+        prepared, order, normalize, method=method, dtype=dtype
+    )
+    return coeffs, _dc_coefficients(prepared)
+
+
+def _dc_coefficients_batch(coordinates, offsets, dtype=float):
+    """Return the ``[K x 2]`` :math:`A_0` and :math:`C_0` coefficients of packed contours."""
+    batch = _prepare_segments_batch(coordinates, offsets, dtype)
+    dxy, dt, counts = batch.dxy, batch.dt.reshape((-1, 1)), batch.counts
+    starts = batch.segment_offsets[:-1]
+    tangents = dxy / dt
+
+    # The arc lengths at the segment ends and the xi and delta of both
+    # coordinates, restarting the sums for each contour.
+    cumulative = np.cumsum(np.concatenate([dt, dxy], axis=1), axis=0)
+    base = np.zeros((counts.shape[0], 3), dtype=dxy.dtype)
+    base[1:] = cumulative[starts[1:] - 1]
+    cumulative -= np.repeat(base, counts, axis=0)
+    t_end = cumulative[:, :1]
+    xi_delta = cumulative[:, 1:] - tangents * t_end
+
+    t_start = t_end - dt
+    terms = tangents * ((t_end ** 2 - t_start ** 2) / 2) + xi_delta * dt
+    T = np.add.reduceat(dt, starts, axis=0)
+    dc = np.add.reduceat(terms, starts, axis=0) / T
+    return batch.coordinates[batch.offsets[:-1]] + dc
+
+
+def _label_cells(padded):
+    """Return the marching squares cells of every label of a padded label image.
+
+    Returns the rows, columns and cases of the cells on the boundary of a
+    label, along with the label, once for each non-zero label of each cell.
+
+    """
+    corners = (padded[:-1, :-1], padded[:-1, 1:], padded[1:, 1:], padded[1:, :-1])
+    uniform = (corners[0] == corners[1]) & (corners[1] == corners[2])
+    uniform &= corners[2] == corners[3]
+    rows, columns = np.nonzero(~uniform)
+    values = [corner[rows, columns] for corner in corners]
+
+    cells = []
+    for k, label in enumerate(values):
+        case = np.zeros(rows.shape[0], dtype=np.intp)
+        for bit, value in enumerate(values):
+            case |= (value == label).astype(np.intp) << bit
+        first = label != 0
+        for value in values[:k]:
+            first &= value != label
+        cells.append((rows[first], columns[first], case[first], label[first]))
+    rows, columns, cases, labels = (np.concatenate(arrays) for arrays in zip(*cells))
+    # In raster order, so that each contour starts where find_contours starts it.
+    raster = np.lexsort((columns, rows))
+    return rows[raster], columns[raster], cases[raster], labels[raster]
+
+
+def efd_from_label_image(
+    labels, order=10, normalize=False, method="direct", dtype=float, workers=1
+):
+    """Calculate elliptical Fourier descriptors of all objects in a label image.
+
+    The boundaries of all labels are traced in a single sweep over the image,
+    as by :py:func:`find_contours` for each label, and the coefficients and loci
+    of the outer boundaries computed in batches. A label consisting of several
+    separate regions is described by the one of largest area.
+
+    :param numpy.ndarray labels: A two dimensional image of non-negative integer
+        labels, where ``0`` is the background.
+    :param int order: The order of Fourier coefficients to calculate.
+    :param bool normalize: If the coefficients should be normalized;
+        see references for details.
+    :param str method: How the harmonics are evaluated, ``"direct"`` or
+        ``"recurrence"``; see :py:func:`elliptic_fourier_descriptors`.
+    :param dtype: The floating point type used throughout the computation.
+        Default is ``float``, i.e. ``numpy.float64``.
+    :type dtype: str or numpy.dtype
+    :param int workers: The number of threads computing the coefficients;
+        see :py:func:`map_elliptic_fourier_descriptors`. Default is ``1``.
+    :return: A ``[L x order x 4]`` array of Fourier coefficients and a ``[L x 2]``
+        array of :math:`A_0` and :math:`C_0` loci in ``(row, column)`` coordinates,
+        indexed by label, where ``L`` is the largest label plus one. The rows of
+        the background and of labels not in the image are NaN.
+    :rtype: (:py:class:`numpy.ndarray`, :py:class:`numpy.ndarray`)
+
+    """
+    labels = np.asarray(labels)
+    if labels.ndim != 2 or not np.issubdtype(labels.dtype, np.integer):
+        raise ValueError("Labels must be a two dimensional integer array.")
+    if labels.size and labels.min() < 0:
+        raise ValueError("Labels must be non-negative.")
+    dtype = _float_dtype(dtype)
+    n_labels = int(labels.max()) + 1 if labels.size else 1
+    coeffs = np.full((n_labels, order, 4), np.nan, dtype=dtype)
+    loci = np.full((n_labels, 2), np.nan, dtype=dtype)
+
+    padded = np.pad(labels, 1)
+    rows, columns, cases, cell_labels = _label_cells(padded)
+    coordinates, offsets, cells = _link_segments(rows, columns, cases, padded.shape)
+    if cells.shape[0] == 0:
+        return coeffs, loci
+    coordinates -= 1
+    contour_labels = cell_labels[cells]
+
+    # The boundary of largest area of each label, which is an outer one.
+    areas = _signed_areas(coordinates, offsets)
+    by_label = np.lexsort((-areas, contour_labels))
+    present, first = np.unique(contour_labels[by_label], return_index=True)
+    selected = by_label[first]
+
+    lengths = offsets[selected + 1] - offsets[selected]
+    packed_offsets = np.zeros(selected.shape[0] + 1, dtype=np.intp)
+    np.cumsum(lengths, out=packed_offsets[1:])
+    index = np.arange(packed_offsets[-1]) + np.repeat(
+        offsets[selected] - packed_offsets[:-1], lengths
+    )
+    packed = coordinates[index]
+
+    coeffs[present] = map_elliptic_fourier_descriptors(
+        packed, packed_offsets, order, normalize, method, dtype, workers=workers
+    )
+    loci[present] = _dc_coefficients_batch(packed, packed_offsets, dtype)
+    return coeffs, loci
+
+
 def plot_efd(coeffs, locus=(0.0, 0.0), image=None, contour=None, n=300):
     """Plot a ``[2 x (N / 2)]`` grid of successive truncations of the series.
 
@@ -255,17 +2755,13 @@ def plot_efd(coeffs, locus=(0.0, 0.0), image=None, contour=None, n=300):
     N_half = int(np.ceil(N / 2))
     n_rows = 2
 
-    t = np.linspace(0, 1.0, n)
+    basis = _reconstruction_basis(N, n, np.dtype(float))
     xt = np.ones((n,)) * locus[0]
     yt = np.ones((n,)) * locus[1]
 
     for n in _range(coeffs.shape[0]):
-        xt += (coeffs[n, 0] * np.cos(2 * (n + 1) * np.pi * t)) + (
-            coeffs[n, 1] * np.sin(2 * (n + 1) * np.pi * t)
-        )
-        yt += (coeffs[n, 2] * np.cos(2 * (n + 1) * np.pi * t)) + (
-            coeffs[n, 3] * np.sin(2 * (n + 1) * np.pi * t)
-        )
+        xt += (coeffs[n, 0] * basis[:, n]) + (coeffs[n, 1] * basis[:, N + n])
+        yt += (coeffs[n, 2] * basis[:, n]) + (coeffs[n, 3] * basis[:, N + n])
         ax = plt.subplot2grid((n_rows, N_half), (n // N_half, n % N_half))
         ax.set_title(str(n + 1))
 
@@ -14,9 +14,11 @@ from __future__ import print_function
 from __future__ import unicode_literals
 from __future__ import absolute_import
 
+import os
 import time
 
 import numpy as np
+import pytest
 from scipy.spatial.distance import directed_hausdorff
 from math import pi
 
@@ -1094,27 +1096,802 @@ def test_performance():
 
     sample_size = 100
 
-    start = time.time()
-
+    start = time.perf_counter()
     for _ in range(sample_size):
         pyefd.elliptic_fourier_descriptors(contour_1, order=30)
+    vectorized_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(sample_size):
+        for_loop_efd(contour_1, order=30)
+    for_loop_time = time.perf_counter() - start
+
+    assert vectorized_time < for_loop_time
+
+
+def test_batch_matches_single():
+    contours = [
+        contour_1,
+        contour_1[::-1] * 2.0 + 3.0,
+        np.array([[1.0, 1.0], [0.0, 1.0], [0.0, 0.0], [0.0, 0.0], [1.0, 0.0]]),
+    ]
+    coordinates, offsets = pyefd.pack_contours(contours)
+    coeffs = pyefd.elliptic_fourier_descriptors_batch(coordinates, offsets, order=20)
+    assert coeffs.shape == (3, 20, 4)
+    for c, contour in zip(coeffs, contours):
+        np.testing.assert_allclose(
+            c, pyefd.elliptic_fourier_descriptors(contour, order=20), atol=1e-10
+        )
+
 
-    stop = time.time()
-    vectorized_time = stop - start
+def test_batch_invalid_offsets():
+    coordinates, offsets = pyefd.pack_contours([contour_1, contour_1])
+    with pytest.raises(ValueError):
+        pyefd.elliptic_fourier_descriptors_batch(coordinates, offsets[:-1])
+    with pytest.raises(ValueError):
+        pyefd.elliptic_fourier_descriptors_batch(
+            np.zeros((4, 2)), np.array([0, 2, 4])
+        )
 
-    print(
-        "Time taken to create order 30 efd coefficients for 1000 contours:",
-        vectorized_time,
+
+def test_zero_order():
+    coordinates, offsets = pyefd.pack_contours([contour_1, contour_1[:20]])
+    for method in ("direct", "recurrence", "fft"):
+        for order in (0, -1):
+            coeffs = pyefd.elliptic_fourier_descriptors(
+                contour_1, order=order, method=method
+            )
+            assert coeffs.shape == (0, 4)
+    for method in ("direct", "recurrence"):
+        for order in (0, -1):
+            coeffs = pyefd.elliptic_fourier_descriptors_batch(
+                coordinates, offsets, order=order, method=method
+            )
+            assert coeffs.shape == (2, 0, 4)
+
+
+def test_recurrence_method():
+    direct = pyefd.elliptic_fourier_descriptors(contour_1, order=200)
+    recurrence = pyefd.elliptic_fourier_descriptors(
+        contour_1, order=200, method="recurrence"
     )
+    np.testing.assert_allclose(recurrence, direct, atol=1e-12)
+    with pytest.raises(ValueError):
+        pyefd.elliptic_fourier_descriptors(contour_1, method="unknown")
 
-    start = time.time()
-    for _ in range(sample_size):
-        for_loop_efd(contour_1, order=30)
 
-    stop = time.time()
-    for_loop_time = stop - start
-    print(
-        "Time taken to create order 30 efd coefficients for 100 contours:",
-        for_loop_time,
+def test_chunked_evaluation():
+    coeffs = pyefd.elliptic_fourier_descriptors(contour_1, order=30)
+    for kwargs in ({"chunk_size": 1}, {"chunk_size": 7}, {"max_memory": 20000}):
+        np.testing.assert_allclose(
+            pyefd.elliptic_fourier_descriptors(contour_1, order=30, **kwargs),
+            coeffs,
+            atol=1e-12,
+        )
+    with pytest.raises(ValueError):
+        pyefd.elliptic_fourier_descriptors(contour_1, order=30, max_memory=10)
+
+
+def test_float32_dtype():
+    coeffs = pyefd.elliptic_fourier_descriptors(contour_1, order=20)
+    coeffs_32 = pyefd.elliptic_fourier_descriptors(
+        contour_1, order=20, dtype=np.float32
     )
-    assert vectorized_time < for_loop_time
+    assert coeffs_32.dtype == np.float32
+    np.testing.assert_allclose(coeffs_32, coeffs, atol=1e-5 * np.abs(coeffs).max())
+
+    normalized = pyefd.normalize_efd(coeffs_32, dtype=np.float32)
+    locus = pyefd.calculate_dc_coefficients(contour_1, dtype=np.float32)
+    reconstruction = pyefd.reconstruct_contour(
+        normalized, locus, num_points=50, dtype=np.float32
+    )
+    assert normalized.dtype == np.float32
+    assert locus[0].dtype == np.float32
+    assert reconstruction.dtype == np.float32
+    with pytest.raises(ValueError):
+        pyefd.elliptic_fourier_descriptors(contour_1, dtype=np.int32)
+
+
+def test_extend_efd():
+    coeffs = pyefd.elliptic_fourier_descriptors(contour_1, order=40)
+    prepared = pyefd.prepare_contour(contour_1)
+    low = pyefd.elliptic_fourier_descriptors(contour_1, order=8)
+    extended = pyefd.extend_efd(prepared, low, order=40, method="recurrence")
+    assert extended.shape == (40, 4)
+    np.testing.assert_array_equal(extended[:8], low)
+    np.testing.assert_allclose(extended, coeffs, atol=1e-12)
+    np.testing.assert_allclose(pyefd.extend_efd(contour_1, coeffs, 8), low, atol=1e-12)
+
+
+def test_prepared_contour():
+    prepared = pyefd.prepare_contour(contour_1)
+    np.testing.assert_allclose(
+        pyefd.elliptic_fourier_descriptors(prepared, order=20),
+        pyefd.elliptic_fourier_descriptors(contour_1, order=20),
+    )
+    np.testing.assert_allclose(
+        pyefd.calculate_dc_coefficients(prepared),
+        pyefd.calculate_dc_coefficients(contour_1),
+    )
+    assert prepared.tangents is prepared.tangents
+    np.testing.assert_allclose(np.linalg.norm(prepared.tangents, axis=1), 1.0)
+    np.testing.assert_almost_equal(
+        prepared.perimeter,
+        np.sum(np.linalg.norm(np.diff(contour_1, axis=0), axis=1)),
+    )
+    assert pyefd.elliptic_fourier_descriptors(
+        prepared, dtype=np.float32
+    ).dtype == np.float32
+    with pytest.raises(AttributeError):
+        prepared.other = None
+
+
+def test_describe_contour():
+    description = pyefd.describe_contour(contour_1, order=15)
+    coeffs, transformation = pyefd.elliptic_fourier_descriptors(
+        contour_1, order=15, normalize=True, return_transformation=True
+    )
+    np.testing.assert_allclose(
+        description.locus, pyefd.calculate_dc_coefficients(contour_1)
+    )
+    np.testing.assert_allclose(
+        description.coeffs, pyefd.elliptic_fourier_descriptors(contour_1, order=15)
+    )
+    np.testing.assert_allclose(description.normalized_coeffs, coeffs)
+    np.testing.assert_allclose(
+        (description.scale, description.psi_1, description.theta_1), transformation
+    )
+
+
+def test_normalize_stack():
+    contours = [contour_1, contour_1[::-1] * 0.5, np.roll(contour_1[:-1], 17, axis=0)]
+    coeffs = np.stack(
+        [pyefd.elliptic_fourier_descriptors(c, order=12) for c in contours]
+    )
+    normalized, (scale, psi_1, theta_1) = pyefd.normalize_efd(
+        coeffs, return_transformation=True
+    )
+    assert normalized.shape == coeffs.shape
+    assert scale.shape == psi_1.shape == theta_1.shape == (3,)
+    for i, c in enumerate(coeffs):
+        single, transformation = pyefd.normalize_efd(c, return_transformation=True)
+        np.testing.assert_allclose(normalized[i], single, atol=1e-12)
+        np.testing.assert_allclose(
+            (scale[i], psi_1[i], theta_1[i]), transformation, atol=1e-12
+        )
+
+
+def test_reconstruct_stack():
+    contours = [contour_1, contour_1 * 2.0 + 5.0]
+    coeffs = np.stack(
+        [pyefd.elliptic_fourier_descriptors(c, order=20) for c in contours]
+    )
+    loci = np.array([pyefd.calculate_dc_coefficients(c) for c in contours])
+    reconstructions = pyefd.reconstruct_contour(coeffs, loci, num_points=64)
+    assert reconstructions.shape == (2, 64, 2)
+    for reconstruction, c, locus in zip(reconstructions, coeffs, loci):
+        np.testing.assert_allclose(
+            reconstruction, pyefd.reconstruct_contour(c, locus, num_points=64)
+        )
+    np.testing.assert_allclose(
+        reconstructions[1] - 5.0, reconstructions[0] * 2.0, atol=1e-10
+    )
+
+
+def test_reconstruct_fft():
+    coeffs = pyefd.elliptic_fourier_descriptors(contour_1, order=30)
+    locus = pyefd.calculate_dc_coefficients(contour_1)
+    for num_points in (2, 17, 31, 300):
+        np.testing.assert_allclose(
+            pyefd.reconstruct_contour(coeffs, locus, num_points, method="fft"),
+            pyefd.reconstruct_contour(coeffs, locus, num_points),
+            atol=1e-12,
+        )
+    stack = np.stack([coeffs, 2 * coeffs])
+    np.testing.assert_allclose(
+        pyefd.reconstruct_contour(stack, num_points=100, method="fft"),
+        pyefd.reconstruct_contour(stack, num_points=100),
+        atol=1e-12,
+    )
+
+
+def test_fft_method():
+    coeffs = pyefd.elliptic_fourier_descriptors(contour_1, order=20)
+    for num_samples in (64, 1024):
+        approximation = pyefd.elliptic_fourier_descriptors(
+            contour_1, order=20, method="fft", num_samples=num_samples
+        )
+        bound = pyefd.fft_error_bound(contour_1, order=20, num_samples=num_samples)
+        assert bound.shape == (20, 4)
+        assert np.all(np.abs(approximation - coeffs) <= bound)
+    with pytest.raises(ValueError):
+        pyefd.elliptic_fourier_descriptors(
+            contour_1, order=20, method="fft", num_samples=40
+        )
+
+
+def test_auto_order():
+    full = pyefd.elliptic_fourier_descriptors(contour_1, order=1000)
+    energy = np.sum(full ** 2) / 2
+    for tol in (1e-2, 1e-4):
+        coeffs = pyefd.elliptic_fourier_descriptors(contour_1, order="auto", tol=tol)
+        order = coeffs.shape[0]
+        np.testing.assert_allclose(coeffs, full[:order], atol=1e-12)
+        residual = energy - np.cumsum(np.sum(full ** 2, axis=1) / 2)
+        assert residual[order - 1] <= tol * energy * (1 + 1e-6)
+        assert residual[order - 2] > tol * energy
+    coeffs = pyefd.elliptic_fourier_descriptors(
+        contour_1, order="auto", tol=1e-12, max_order=20
+    )
+    assert coeffs.shape == (20, 4)
+
+
+def test_basis_cache():
+    coeffs = pyefd.elliptic_fourier_descriptors(contour_1, order=10)
+    pyefd.basis_cache.clear()
+    first = pyefd.reconstruct_contour(coeffs, num_points=123)
+    second = pyefd.reconstruct_contour(coeffs, num_points=123)
+    np.testing.assert_array_equal(first, second)
+    info = pyefd.basis_cache.info()
+    assert (info.hits, info.misses, info.currsize) == (1, 1, 1)
+
+    cache = pyefd.LRUCache(maxsize=2)
+    for key in range(3):
+        cache.put(key, np.zeros(10))
+    assert 0 not in cache and cache.get(2) is not None
+    cache.resize(max_bytes=100)
+    assert len(cache) == 1 and cache.info().evictions == 2
+    cache.put(3, np.zeros(20))
+    assert 3 not in cache and cache.get(2) is not None
+
+    pyefd.basis_cache.resize(maxsize=16, max_bytes=1000)
+    try:
+        pyefd.reconstruct_contour(coeffs, num_points=124)
+        assert pyefd.basis_cache.info().currsize == 0
+    finally:
+        pyefd.basis_cache.resize(maxsize=16, max_bytes=64 * 2 ** 20)
+
+
+def test_descriptor_cache():
+    cache = pyefd.DescriptorCache()
+    coeffs = pyefd.elliptic_fourier_descriptors(contour_1, order=12, cache=cache)
+    coeffs[:] = 0.0
+    again = pyefd.elliptic_fourier_descriptors(contour_1.copy(), order=12, cache=cache)
+    np.testing.assert_array_equal(
+        again, pyefd.elliptic_fourier_descriptors(contour_1, order=12)
+    )
+    pyefd.elliptic_fourier_descriptors(contour_1, order=12, normalize=True, cache=cache)
+    info = cache.info()
+    assert (info.hits, info.misses, info.currsize) == (1, 2, 2)
+
+    calls = []
+
+    @cache
+    def perimeter(contour):
+        calls.append(contour)
+        return pyefd.prepare_contour(contour).perimeter
+
+    assert perimeter(contour_1) == perimeter(contour_1.copy())
+    assert len(calls) == 1
+
+    @cache
+    def weighted(contour, weights, scale=1.0):
+        return np.array([np.dot(weights, contour[: weights.shape[0], 0]) * scale])
+
+    # Large arrays have abbreviated reprs, but are keyed by their content.
+    weights = np.zeros(2000)
+    other = weights.copy()
+    other[1000] = 1.0
+    contour = np.full((2000, 2), 5.0)
+    np.testing.assert_array_equal(weighted(contour, weights), [0.0])
+    np.testing.assert_array_equal(weighted(contour, other), [5.0])
+    np.testing.assert_array_equal(weighted(contour, weights=other, scale=2), [10.0])
+    with pytest.raises(TypeError):
+        weighted(contour, weights, scale=object())
+
+    @cache
+    def scaled(contour, args=1.0, function=None):
+        return np.array([args])
+
+    # Keywords named like the parametres of the key are keyed as any other.
+    np.testing.assert_array_equal(scaled(contour, args=2.0, function="f"), [2.0])
+    np.testing.assert_array_equal(scaled(contour, args=3.0, function="f"), [3.0])
+
+
+def test_disk_descriptor_cache(tmp_path):
+    directory = str(tmp_path / "cache")
+    with pyefd.DiskDescriptorCache(directory, shard_size=100) as cache:
+        coeffs = pyefd.elliptic_fourier_descriptors(contour_1, order=10, cache=cache)
+        normalized, transformation = pyefd.elliptic_fourier_descriptors(
+            contour_1,
+            order=20,
+            normalize=True,
+            return_transformation=True,
+            cache=cache,
+        )
+        assert cache.info().misses == 2
+
+    with pyefd.DiskDescriptorCache(directory, shard_size=100) as cache:
+        assert len(cache) == 2
+        cached = pyefd.elliptic_fourier_descriptors(contour_1, order=10, cache=cache)
+        assert not cached.flags.writeable
+        np.testing.assert_array_equal(cached, coeffs)
+        cached, cached_transformation = pyefd.elliptic_fourier_descriptors(
+            contour_1,
+            order=20,
+            normalize=True,
+            return_transformation=True,
+            cache=cache,
+        )
+        np.testing.assert_array_equal(cached, normalized)
+        np.testing.assert_array_equal(cached_transformation, transformation)
+        assert cache.info().hits == 2
+
+    calls = []
+
+    with pyefd.DiskDescriptorCache(directory, shard_size=100) as cache:
+
+        @cache
+        def summary(contour):
+            calls.append(contour)
+            return np.ones((2, 4)), np.arange(5.0), (np.float64(0.5), 2.0)
+
+        @cache
+        def perimeter(contour):
+            return pyefd.prepare_contour(contour).perimeter
+
+        expected = summary(contour_1)
+        length = perimeter(contour_1)
+        with pytest.raises(TypeError):
+            cache.put("ragged", (np.ones(2), np.ones(2, dtype=np.float32)))
+        with pytest.raises(TypeError):
+            cache.put("order", (np.ones(2), 10))
+        with pytest.raises(TypeError):
+            cache.put("list", [np.ones(2)])
+
+    with pyefd.DiskDescriptorCache(directory, shard_size=100) as cache:
+        summary = cache(summary.__wrapped__)
+        perimeter = cache(perimeter.__wrapped__)
+        for _ in range(2):
+            coeffs, values, (half, two) = summary(contour_1)
+            np.testing.assert_array_equal(coeffs, expected[0])
+            np.testing.assert_array_equal(values, expected[1])
+            assert (half, two) == (0.5, 2.0)
+            assert perimeter(contour_1) == length
+            assert np.ndim(perimeter(contour_1)) == 0
+            assert not isinstance(perimeter(contour_1), np.ndarray)
+        assert len(calls) == 1
+
+        # New entries continue after the last one, without overwriting it.
+        cache.put("next", np.full(3, 7.0))
+        np.testing.assert_array_equal(summary(contour_1)[1], expected[1])
+        np.testing.assert_array_equal(cache.get("next"), np.full(3, 7.0))
+
+    with pyefd.DiskDescriptorCache(directory, shard_size=100) as cache:
+        for key in ("tab\tkey", "line\nkey"):
+            with pytest.raises(ValueError):
+                cache.put(key, np.ones(2))
+
+    # An interrupted index write and malformed records are dropped on opening.
+    with open(os.path.join(directory, "index.tsv"), "a") as f:
+        f.write("malformed\tline\n")
+        f.write("partial\tf8-00000.npy\t0\t3\t[\"a\"")
+    with pyefd.DiskDescriptorCache(directory, shard_size=100) as cache:
+        assert "malformed" not in cache and "partial" not in cache
+        np.testing.assert_array_equal(cache.get("next"), np.full(3, 7.0))
+        cache.put("after", np.full(2, 3.0))
+    with pyefd.DiskDescriptorCache(directory, shard_size=100) as cache:
+        np.testing.assert_array_equal(cache.get("after"), np.full(2, 3.0))
+
+    # Reopened with another shard size, the existing shards keep their size.
+    directory = str(tmp_path / "resized")
+    with pyefd.DiskDescriptorCache(directory, shard_size=10) as cache:
+        cache.put("small", np.full(5, 1.0))
+    with pyefd.DiskDescriptorCache(directory) as cache:
+        cache.put("large", np.full(20, 2.0))
+    with pyefd.DiskDescriptorCache(directory, shard_size=10) as cache:
+        np.testing.assert_array_equal(cache.get("small"), np.full(5, 1.0))
+        np.testing.assert_array_equal(cache.get("large"), np.full(20, 2.0))
+
+
+def test_benchmarks(tmp_path):
+    import importlib.util
+    import json
+    import os
+
+    path = os.path.join(os.path.dirname(__file__), "benchmarks", "run_benchmarks.py")
+    spec = importlib.util.spec_from_file_location("run_benchmarks", path)
+    run_benchmarks = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(run_benchmarks)
+
+    output = str(tmp_path / "results.json")
+    arguments = ["--lengths", "50", "--orders", "5", "--batch-sizes", "1", "3"]
+    arguments += ["--repeat", "2", "--min-time", "0", "--output", output]
+    assert run_benchmarks.main(arguments) == 0
+    with open(output) as f:
+        results = json.load(f)
+    assert len(results["results"]) == 4 * 2 * 2
+    assert {r["function"] for r in results["results"]} == set(run_benchmarks.FUNCTIONS)
+    assert all(r["best"] > 0 for r in results["results"])
+
+    slower = json.loads(json.dumps(results))
+    for r in slower["results"]:
+        r["best"] *= 100
+    assert run_benchmarks.compare(slower, results) == []
+    assert len(run_benchmarks.compare(results, slower)) == len(results["results"])
+
+
+def _peak_memory(function, *args, **kwargs):
+    import tracemalloc
+
+    tracemalloc.start()
+    try:
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        function(*args, **kwargs)
+        return tracemalloc.get_traced_memory()[1] - size
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_memory_budgets(dtype):
+    # The budgets documented in the "Memory use" section of the documentation.
+    overhead = 64 * 2 ** 10
+    itemsize = np.dtype(dtype).itemsize
+    angles = np.linspace(0, 2 * np.pi, 20000, endpoint=False)
+    contour = np.stack([np.cos(angles), np.sin(3 * angles)], axis=1)
+    M, order = contour.shape[0], 50
+
+    for method in ("direct", "recurrence"):
+        for chunk_size in (None, 1000):
+            budget = 5 * order * (chunk_size or M) + 20 * M
+            assert (
+                _peak_memory(
+                    pyefd.elliptic_fourier_descriptors,
+                    contour,
+                    order=order,
+                    method=method,
+                    chunk_size=chunk_size,
+                    dtype=dtype,
+                )
+                < budget * itemsize + overhead
+            )
+    assert (
+        _peak_memory(pyefd.calculate_dc_coefficients, contour, dtype=dtype)
+        < 20 * M * itemsize + overhead
+    )
+
+    K, n, P = 200, order, 1000
+    coeffs = np.random.default_rng(0).normal(size=(K, n, 4)).astype(dtype)
+    assert (
+        _peak_memory(pyefd.normalize_efd, coeffs, dtype=dtype)
+        < 8 * K * n * 4 * itemsize + overhead
+    )
+    pyefd.basis_cache.clear()
+    assert (
+        _peak_memory(pyefd.reconstruct_contour, coeffs, num_points=P, dtype=dtype)
+        < (8 * K * P + 6 * n * P) * itemsize + overhead
+    )
+    # With a cached basis, only the reconstruction itself is allocated.
+    assert (
+        _peak_memory(pyefd.reconstruct_contour, coeffs, num_points=P, dtype=dtype)
+        < 8 * K * P * itemsize + overhead
+    )
+
+
+def test_stage_profiler():
+    calls = []
+    hook = lambda stage, elapsed: calls.append((stage, elapsed))  # noqa: E731
+    pyefd.add_profile_hook(hook)
+    try:
+        pyefd.calculate_dc_coefficients(contour_1)
+    finally:
+        pyefd.remove_profile_hook(hook)
+    assert [stage for stage, _ in calls] == ["prepare", "dc"]
+    assert all(elapsed >= 0 for _, elapsed in calls)
+
+    with pyefd.StageProfiler() as profiler:
+        coeffs = pyefd.elliptic_fourier_descriptors(
+            contour_1, order=10, normalize=True, chunk_size=5
+        )
+        pyefd.reconstruct_contour(coeffs)
+        pyefd.elliptic_fourier_descriptors(contour_1, order=10, method="fft")
+    pyefd.elliptic_fourier_descriptors(contour_1, order=10)
+
+    stats = profiler.stats
+    n_chunks = -(-(contour_1.shape[0] - 1) // 5)
+    assert stats["prepare"].calls == 2
+    assert stats["harmonics"].calls == stats["reduce"].calls == n_chunks
+    assert stats["normalize"].calls == stats["reconstruct"].calls == 1
+    assert stats["fft"].calls == 1
+    assert set(stats) <= set(pyefd.STAGES)
+    assert profiler.to_dict()["reduce"] == {
+        "calls": n_chunks,
+        "time": stats["reduce"].time,
+    }
+    profiler.reset()
+    assert profiler.to_dict() == {}
+
+
+def test_backend_loops():
+    # The loops compiled by the numba backend, run as plain Python.
+    coeffs = np.zeros((10, 4))
+    T = pyefd._efd_loop(contour_1, 10, False, np.finfo(float).eps, coeffs)
+    np.testing.assert_allclose(coeffs, pyefd.elliptic_fourier_descriptors(contour_1))
+    assert T == pytest.approx(pyefd.prepare_contour(contour_1).perimeter)
+    recurrence = np.zeros((10, 4))
+    pyefd._efd_loop(contour_1, 10, True, np.finfo(float).eps, recurrence)
+    np.testing.assert_allclose(recurrence, coeffs, rtol=1e-10, atol=1e-12)
+
+    A0, C0, _ = pyefd._dc_loop(contour_1, np.finfo(float).eps)
+    np.testing.assert_allclose(
+        (A0, C0), pyefd.calculate_dc_coefficients(contour_1), rtol=1e-12
+    )
+
+    out = np.empty((1, 50, 2))
+    pyefd._reconstruct_loop(coeffs[None], np.array([[A0, C0]]), out)
+    np.testing.assert_allclose(
+        out[0],
+        pyefd.reconstruct_contour(coeffs, (A0, C0), num_points=50),
+        rtol=1e-10,
+        atol=1e-10,
+    )
+
+
+def test_numba_backend():
+    pytest.importorskip("numba")
+    stack = np.stack([pyefd.elliptic_fourier_descriptors(contour_1)] * 3)
+    loci = np.arange(6.0).reshape((3, 2))
+    for dtype, rtol in ((np.float64, 1e-10), (np.float32, 1e-4)):
+        for method in ("direct", "recurrence"):
+            coeffs = pyefd.elliptic_fourier_descriptors(
+                contour_1, order=20, method=method, dtype=dtype, backend="numba"
+            )
+            assert coeffs.dtype == dtype
+            np.testing.assert_allclose(
+                coeffs,
+                pyefd.elliptic_fourier_descriptors(contour_1, order=20, dtype=dtype),
+                rtol=rtol,
+                atol=rtol * np.abs(coeffs).max(),
+            )
+        locus = pyefd.calculate_dc_coefficients(contour_1, dtype, backend="numba")
+        assert locus[0].dtype == dtype
+        np.testing.assert_allclose(
+            locus, pyefd.calculate_dc_coefficients(contour_1), rtol=rtol
+        )
+        reconstruction = pyefd.reconstruct_contour(
+            stack, loci, dtype=dtype, backend="numba"
+        )
+        assert reconstruction.dtype == dtype
+        np.testing.assert_allclose(
+            reconstruction,
+            pyefd.reconstruct_contour(stack, loci),
+            rtol=rtol,
+            atol=rtol * 10,
+        )
+
+    with pytest.raises(ValueError):
+        pyefd.elliptic_fourier_descriptors(np.ones((5, 2)), backend="numba")
+    with pytest.raises(ValueError):
+        pyefd.set_backend("fortran")
+
+    pyefd.set_backend("numba")
+    try:
+        assert pyefd.get_backend() == "numba"
+        np.testing.assert_allclose(
+            pyefd.elliptic_fourier_descriptors(contour_1, normalize=True),
+            pyefd.elliptic_fourier_descriptors(
+                contour_1, normalize=True, backend="numpy"
+            ),
+            rtol=1e-10,
+            atol=1e-12,
+        )
+        # Orders chosen adaptively fall back to the NumPy implementation.
+        pyefd.elliptic_fourier_descriptors(contour_1, order="auto")
+    finally:
+        pyefd.set_backend("numpy")
+
+
+def test_bulk_elliptic_fourier_descriptors():
+    contours = [contour_1, contour_1[::-1] * 2.0 + 3.0, contour_1[:20]] * 3
+    expected = np.stack(
+        [pyefd.elliptic_fourier_descriptors(c, normalize=True) for c in contours]
+    )
+    serial = pyefd.bulk_elliptic_fourier_descriptors(
+        contours, normalize=True, workers=1, batch_size=2
+    )
+    np.testing.assert_allclose(serial, expected, rtol=1e-10, atol=1e-12)
+
+    coordinates, offsets = pyefd.pack_contours(contours)
+    parallel = pyefd.bulk_elliptic_fourier_descriptors(
+        coordinates, offsets, normalize=True, workers=2, batch_size=2
+    )
+    # The ordering and the result do not depend on the number of workers.
+    np.testing.assert_array_equal(parallel, serial)
+
+    assert pyefd.bulk_elliptic_fourier_descriptors([], order=5).shape == (0, 5, 4)
+    for invalid in (offsets[:-1], offsets[1:], offsets[[0, 2, 1, -1]]):
+        with pytest.raises(ValueError):
+            pyefd.bulk_elliptic_fourier_descriptors(coordinates, invalid, workers=1)
+        with pytest.raises(ValueError):
+            pyefd.map_elliptic_fourier_descriptors(coordinates, invalid, workers=1)
+    with pytest.raises(ValueError):
+        pyefd.bulk_elliptic_fourier_descriptors(
+            [contour_1, np.ones((3, 2))], workers=2, batch_size=1
+        )
+
+
+def test_map_elliptic_fourier_descriptors():
+    from concurrent.futures import ThreadPoolExecutor
+
+    contours = [contour_1, contour_1[::-1] * 2.0 + 3.0, contour_1[:20]] * 5
+    expected = np.stack([pyefd.elliptic_fourier_descriptors(c) for c in contours])
+    np.testing.assert_allclose(
+        pyefd.map_elliptic_fourier_descriptors(contours, workers=3),
+        expected,
+        rtol=1e-10,
+        atol=1e-12,
+    )
+
+    coordinates, offsets = pyefd.pack_contours(contours)
+    out = np.empty((len(contours), 10, 4), dtype=np.float32)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        result = pyefd.map_elliptic_fourier_descriptors(
+            coordinates,
+            offsets,
+            dtype=np.float32,
+            batch_size=4,
+            out=out,
+            executor=executor,
+        )
+    assert result is out
+    np.testing.assert_allclose(out, expected, rtol=1e-4, atol=1e-4)
+
+    with pytest.raises(ValueError):
+        pyefd.map_elliptic_fourier_descriptors(contours, out=np.empty((1, 10, 4)))
+
+    # Tasks of a similar number of vertices, split between contours.
+    assert pyefd._balanced_ranges(np.array([0, 100, 101, 300]), 50) == [(0, 1), (1, 3)]
+    assert pyefd._balanced_ranges(np.array([0]), 50) == []
+
+
+def test_efd_async():
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+
+    class CountingExecutor(ThreadPoolExecutor):
+        submitted = 0
+
+        def submit(self, *args, **kwargs):
+            self.submitted += 1
+            return super(CountingExecutor, self).submit(*args, **kwargs)
+
+    contours = [contour_1, contour_1[::-1] * 2.0 + 3.0, contour_1[:20]] * 4
+    expected = [pyefd.elliptic_fourier_descriptors(c, normalize=True) for c in contours]
+
+    async def requests(batcher):
+        coeffs = await asyncio.gather(
+            *[pyefd.efd_async(c, normalize=True, batcher=batcher) for c in contours]
+        )
+        # An invalid contour only fails its own request.
+        results = await asyncio.gather(
+            batcher.submit(contour_1, order=5),
+            batcher.submit(np.ones((4, 2)), order=5),
+            return_exceptions=True,
+        )
+        default = await pyefd.efd_async(contour_1, order=5)
+        return coeffs, results, default
+
+    with CountingExecutor(max_workers=2) as executor:
+        batcher = pyefd.DescriptorBatcher(
+            max_batch_size=5, max_delay=0.05, executor=executor
+        )
+        coeffs, results, default = asyncio.run(requests(batcher))
+        assert executor.submitted == 3 + 1
+
+    for c, e in zip(coeffs, expected):
+        np.testing.assert_allclose(c, e, rtol=1e-10, atol=1e-12)
+    np.testing.assert_allclose(results[0], default, rtol=1e-10, atol=1e-12)
+    assert isinstance(results[1], ValueError)
+
+
+def test_opencv_contours():
+    contour = np.round(contour_1 * 10).astype(np.int32)
+    opencv = contour.reshape((-1, 1, 2))
+    expected = pyefd.elliptic_fourier_descriptors(contour.astype(float))
+    np.testing.assert_array_equal(pyefd.elliptic_fourier_descriptors(opencv), expected)
+    np.testing.assert_array_equal(
+        pyefd.calculate_dc_coefficients(opencv),
+        pyefd.calculate_dc_coefficients(contour.astype(float)),
+    )
+    single = pyefd.elliptic_fourier_descriptors(opencv, dtype=np.float32)
+    assert single.dtype == np.float32
+    assert pyefd.calculate_dc_coefficients(opencv, np.float32)[0].dtype == np.float32
+    np.testing.assert_allclose(single, expected, rtol=1e-4, atol=1e-4)
+
+    coordinates, offsets = pyefd.pack_contours([opencv, contour])
+    assert coordinates.dtype == float
+    np.testing.assert_array_equal(coordinates[: offsets[1]], contour)
+
+    with pytest.raises(ValueError):
+        pyefd.elliptic_fourier_descriptors(opencv.reshape((-1, 2, 1)))
+
+
+def test_find_contours():
+    mask = np.zeros((7, 8), dtype=bool)
+    mask[1:6, 1:6] = True
+    mask[3, 3] = False
+    mask[0, 6] = True  # diagonally adjacent, i.e. part of the same object
+    mask[5, 7] = True
+    coordinates, offsets = pyefd.find_contours(mask)
+    np.testing.assert_array_equal(offsets, [0, 24, 28, 32])
+    np.testing.assert_array_equal(
+        coordinates[offsets[2] :], [[4.5, 7], [5, 6.5], [5.5, 7], [5, 7.5]]
+    )
+    # Outer boundaries run counter-clockwise, holes clockwise.
+    np.testing.assert_array_equal(
+        pyefd._signed_areas(coordinates, offsets), [25.5, -0.5, 0.5]
+    )
+
+    coordinates, offsets = pyefd.find_contours(np.zeros((3, 3), dtype=bool))
+    assert coordinates.shape == (0, 2)
+    np.testing.assert_array_equal(offsets, [0])
+    with pytest.raises(ValueError):
+        pyefd.find_contours(np.zeros((3, 3, 3), dtype=bool))
+
+
+def test_efd_from_mask():
+    # The fixture contour is traced at a level between the black pixels
+    # and their neighbours, i.e. within half a pixel of the midpoints.
+    mask = img_1 < 1
+    coordinates, offsets = pyefd.find_contours(mask)
+    contour = coordinates[offsets[0] : offsets[1]]
+    assert directed_hausdorff(contour, contour_1)[0] < 0.5
+    assert directed_hausdorff(contour_1, contour)[0] < 0.5
+
+    coeffs, locus = pyefd.efd_from_mask(mask, order=20)
+    np.testing.assert_allclose(
+        coeffs, pyefd.elliptic_fourier_descriptors(contour, order=20)
+    )
+    np.testing.assert_allclose(locus, pyefd.calculate_dc_coefficients(contour))
+    reconstruction = pyefd.reconstruct_contour(coeffs, locus)
+    expected = pyefd.reconstruct_contour(
+        pyefd.elliptic_fourier_descriptors(contour_1, order=20),
+        pyefd.calculate_dc_coefficients(contour_1),
+    )
+    assert directed_hausdorff(reconstruction, expected)[0] < 1.0
+
+    with pytest.raises(ValueError):
+        pyefd.efd_from_mask(np.zeros((3, 3), dtype=bool))
+
+
+def test_efd_from_label_image():
+    labels = np.zeros((12, 14), dtype=int)
+    labels[1:5, 1:5] = 3
+    labels[2, 2] = 9
+    labels[1:5, 5:9] = 7
+    labels[0, 13] = 7
+    labels[6:11, 2:12] = 1
+    labels[8, 6] = 0
+    coeffs, loci = pyefd.efd_from_label_image(labels, order=6)
+    assert coeffs.shape == (10, 6, 4)
+    assert loci.shape == (10, 2)
+    for label in (1, 3, 7, 9):
+        expected, locus = pyefd.efd_from_mask(labels == label, order=6)
+        np.testing.assert_allclose(coeffs[label], expected, atol=1e-12)
+        np.testing.assert_allclose(loci[label], locus)
+    assert np.isnan(coeffs[[0, 2, 4, 5, 6, 8]]).all()
+    assert np.isnan(loci[[0, 2, 4, 5, 6, 8]]).all()
+
+    coeffs, loci = pyefd.efd_from_label_image(labels, normalize=True, dtype="float32")
+    assert coeffs.dtype == np.float32
+    # The outer boundary of label 3 is a square, with a sign ambiguous rotation.
+    np.testing.assert_allclose(np.abs(coeffs[3, 0, 0]), 1.0, rtol=1e-6)
+
+    coeffs, loci = pyefd.efd_from_label_image(np.zeros((3, 3), dtype=int))
+    assert np.isnan(coeffs).all() and np.isnan(loci).all()
+    with pytest.raises(ValueError):
+        pyefd.efd_from_label_image(labels - 1)
+    with pytest.raises(ValueError):
+        pyefd.efd_from_label_image(labels.astype(float))